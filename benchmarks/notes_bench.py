@@ -0,0 +1,270 @@
+"""Benchmark notes ingestion and retrieval on a synthetic corpus.
+
+Generates txt/csv/json notes with planted facts, then measures ingestion
+throughput, cold start (reopen + first query), query p50/p99, RSS and
+recall@k (planted answer present in one of the top k chunks). Each phase
+runs in a fresh subprocess.
+
+    python -m benchmarks.notes_bench --txt-files 50 --csv-rows 20000 --json-entries 5000
+
+Use --embedding hash to run fully offline without the MiniLM model; the
+default uses the same local ONNX model as the bot.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+_WORDS = (
+    "raid guild boss loot gear speed attack defense healer tank support "
+    "event schedule reset weekly daily arena tower dungeon hunt artifact "
+    "stamina crystal summon banner rate pity skill cooldown buff debuff"
+).split()
+_CITIES = ("Seoul", "Tokyo", "Paris", "Denver", "Toronto", "Lisbon", "Osaka", "Busan")
+_ROLES = ("tank", "healer", "dps", "support")
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class HashEmbeddingFunction:
+    """Deterministic bag-of-words hashing embedder (no model download)."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, texts):
+        vectors = []
+        for text in texts:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+                vector[int.from_bytes(digest, "little") % self.dim] += 1
+            vector /= np.linalg.norm(vector) or 1
+            vectors.append(vector)
+        return vectors
+
+
+def _filler(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def generate_corpus(root: Path, txt_files: int, csv_rows: int, json_entries: int, seed: int):
+    """Write a synthetic notes folder and return its labeled queries."""
+    rng = random.Random(seed)
+    notes = root / "notes"
+    notes.mkdir(parents=True, exist_ok=True)
+    queries = []
+
+    for file_index in range(txt_files):
+        paragraphs = []
+        for fact_index in range(10):
+            project = f"X{file_index:03d}{fact_index}"
+            codename = f"{rng.choice(_WORDS)}-{rng.choice(_WORDS)}-{rng.randint(100, 999)}"
+            paragraphs.append(
+                " ".join(_filler(rng, rng.randint(8, 20)) for _ in range(rng.randint(2, 5)))
+                + f" The codename of project {project} is {codename}."
+            )
+            queries.append(
+                {"query": f"What is the codename of project {project}?", "answer": codename}
+            )
+        (notes / f"notes_{file_index:03d}.txt").write_text(
+            "\n\n".join(paragraphs), encoding="utf-8"
+        )
+
+    if csv_rows:
+        with open(notes / "players.csv", "w", encoding="utf-8") as f:
+            f.write("player_id,name,city,role,score\n")
+            for row in range(csv_rows):
+                player_id = f"P{row:06d}"
+                f.write(
+                    f"{player_id},{rng.choice(_WORDS).title()}{row},"
+                    f"{rng.choice(_CITIES)},{rng.choice(_ROLES)},{rng.randint(0, 9999)}\n"
+                )
+                if row % max(1, csv_rows // 100) == 0:
+                    queries.append(
+                        {"query": f"Which city is player {player_id} in?", "answer": player_id}
+                    )
+
+    if json_entries:
+        with open(notes / "items.json", "w", encoding="utf-8") as f:
+            f.write("[\n")
+            for entry in range(json_entries):
+                item_id = f"ITEM-{entry:05d}"
+                item = {
+                    "id": item_id,
+                    "slot": rng.choice(("weapon", "helmet", "armor", "boots")),
+                    "stat": rng.choice(_WORDS),
+                    "value": rng.randint(1, 100),
+                }
+                f.write(("," if entry else "") + json.dumps(item) + "\n")
+                if entry % max(1, json_entries // 100) == 0:
+                    queries.append(
+                        {"query": f"What are the stats of {item_id}?", "answer": item_id}
+                    )
+            f.write("]\n")
+
+    return queries
+
+
+def _configure(root: Path, backend: str, embedding: str):
+    import utils.chroma_client as chroma_client
+    import utils.vector_store as vector_store
+
+    chroma_client.CHROMA_PATH = str(root / "chroma_db")
+    vector_store.NUMPY_STORE_PATH = root / "vector_store"
+    vector_store.VECTOR_BACKEND = backend
+
+    import utils.notes as notes
+
+    notes.NOTES_FOLDER = root / "notes"
+    if embedding == "hash":
+        notes.embedding_function = HashEmbeddingFunction()
+    return notes
+
+
+def _ingest(root: Path, backend: str, embedding: str) -> dict:
+    notes = _configure(root, backend, embedding)
+    notes_bytes = sum(p.stat().st_size for p in (root / "notes").rglob("*") if p.is_file())
+
+    start = time.perf_counter()
+    notes.load_personal_notes()
+    elapsed = time.perf_counter() - start
+
+    chunks = sum(namespace.store.count() for namespace in notes._namespaces.values())
+    return {
+        "ingest_s": elapsed,
+        "files": notes.get_load_progress()["files_total"],
+        "chunks": chunks,
+        "mb_per_s": notes_bytes / (1024 * 1024) / elapsed,
+        "chunks_per_s": chunks / elapsed,
+        "ingest_peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _query(root: Path, backend: str, embedding: str, k: int) -> dict:
+    queries = json.loads((root / "queries.json").read_text(encoding="utf-8"))
+    baseline_rss = _rss_mb()
+
+    start = time.perf_counter()
+    notes = _configure(root, backend, embedding)
+    notes.warmup_embedding_model()
+    notes.load_personal_notes()
+    notes.search_personal_notes(queries[0]["query"], n_results=k)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for labeled in queries:
+        start = time.perf_counter()
+        notes.search_personal_notes(labeled["query"], n_results=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    hits = 0
+    for labeled in queries:
+        chunks = notes.retrieve_personal_notes(labeled["query"], n_results=k)
+        if any(labeled["answer"] in chunk for chunk in chunks):
+            hits += 1
+
+    return {
+        "cold_start_s": cold_start,
+        "queries": len(queries),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "recall_at_k": hits / len(queries),
+        "rss_mb": _rss_mb() - baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_phase(phase: str, root: Path, args) -> dict:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.notes_bench",
+            "--phase",
+            phase,
+            "--root",
+            str(root),
+            "--backend",
+            args.backend,
+            "--embedding",
+            args.embedding,
+            "-k",
+            str(args.k),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _run(root: Path, args) -> tuple[dict, dict]:
+    queries = generate_corpus(
+        root, args.txt_files, args.csv_rows, args.json_entries, args.seed
+    )
+    (root / "queries.json").write_text(json.dumps(queries), encoding="utf-8")
+    return _run_phase("ingest", root, args), _run_phase("query", root, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--txt-files", type=int, default=20)
+    parser.add_argument("--csv-rows", type=int, default=5000)
+    parser.add_argument("--json-entries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--backend", choices=("chroma", "numpy"), default="chroma")
+    parser.add_argument("--embedding", choices=("default", "hash"), default="default")
+    parser.add_argument("--keep", type=Path, help="Write the corpus here and keep it")
+    parser.add_argument("--phase", choices=("ingest", "query"), help=argparse.SUPPRESS)
+    parser.add_argument("--root", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase == "ingest":
+        print(json.dumps(_ingest(args.root, args.backend, args.embedding)))
+        return
+    if args.phase == "query":
+        print(json.dumps(_query(args.root, args.backend, args.embedding, args.k)))
+        return
+
+    if args.keep:
+        ingest, query = _run(args.keep, args)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            ingest, query = _run(Path(tmp), args)
+
+    print(f"backend={args.backend} embedding={args.embedding} k={args.k}")
+    print(
+        f"ingest: {ingest['files']} files -> {ingest['chunks']} chunks in "
+        f"{ingest['ingest_s']:.2f}s ({ingest['mb_per_s']:.2f} MB/s, "
+        f"{ingest['chunks_per_s']:.0f} chunks/s, peak RSS {ingest['ingest_peak_rss_mb']:.0f} MB)"
+    )
+    print(f"cold start: {query['cold_start_s']:.2f}s")
+    print(
+        f"query: p50 {query['p50_ms']:.2f} ms, p99 {query['p99_ms']:.2f} ms "
+        f"over {query['queries']} queries"
+    )
+    print(f"recall@{args.k}: {query['recall_at_k']:.3f}")
+    print(f"memory: +{query['rss_mb']:.0f} MB RSS after load, peak {query['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
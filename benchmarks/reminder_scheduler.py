@@ -0,0 +1,180 @@
+"""Compare the heap reminder scheduler with one asyncio task per reminder.
+
+Schedules N far-future reminders plus a burst that comes due within a few
+seconds, then reports schedule/cancel cost, memory and firing lateness.
+Each mode runs in a fresh subprocess so memory numbers are independent.
+
+    python -m benchmarks.reminder_scheduler --reminders 100000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+MODES = ("heap", "tasks")
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def _reminders(count: int, due_count: int, seed: int):
+    from utils.scheduler import Reminder
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    reminders = [
+        Reminder(i, 1, 1, "far", now + timedelta(seconds=rng.uniform(3600, 90 * 86400)))
+        for i in range(count)
+    ]
+    burst_start = now + timedelta(seconds=3)
+    reminders += [
+        Reminder(
+            count + i, 1, 1, "due", burst_start + timedelta(seconds=rng.uniform(0, 2))
+        )
+        for i in range(due_count)
+    ]
+    return reminders
+
+
+async def _run_heap(reminders, cancels, due_count):
+    from utils.scheduler import ReminderScheduler
+
+    lateness = []
+    done = asyncio.Event()
+
+    async def on_due(batch):
+        now = time.time()
+        for reminder in batch:
+            lateness.append(now - reminder.remind_at.timestamp())
+        if len(lateness) >= due_count:
+            done.set()
+
+    scheduler = ReminderScheduler(on_due)
+    start = time.perf_counter()
+    for reminder in reminders:
+        scheduler.schedule(reminder)
+    schedule_s = time.perf_counter() - start
+    scheduler.start()
+    memory = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    for reminder_id in cancels:
+        scheduler.cancel(reminder_id)
+    cancel_s = time.perf_counter() - start
+
+    await done.wait()
+    await scheduler.stop()
+    return schedule_s, cancel_s, memory, lateness
+
+
+async def _run_tasks(reminders, cancels, due_count):
+    lateness = []
+    done = asyncio.Event()
+    tasks = {}
+
+    async def fire(reminder):
+        delay = reminder.remind_at.timestamp() - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lateness.append(time.time() - reminder.remind_at.timestamp())
+        if len(lateness) >= due_count:
+            done.set()
+
+    start = time.perf_counter()
+    for reminder in reminders:
+        tasks[reminder.id] = asyncio.create_task(fire(reminder))
+    schedule_s = time.perf_counter() - start
+    await asyncio.sleep(0)
+    memory = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    for reminder_id in cancels:
+        tasks.pop(reminder_id).cancel()
+    cancel_s = time.perf_counter() - start
+
+    await done.wait()
+    for task in tasks.values():
+        task.cancel()
+    return schedule_s, cancel_s, memory, lateness
+
+
+def _phase(mode: str, count: int, due_count: int, seed: int) -> dict:
+    reminders = _reminders(count, due_count, seed)
+    cancels = random.Random(seed).sample(range(count), min(count, 1000))
+    baseline_rss = _rss_mb()
+
+    tracemalloc.start()
+    runner = _run_heap if mode == "heap" else _run_tasks
+    schedule_s, cancel_s, memory, lateness = asyncio.run(
+        runner(reminders, cancels, due_count)
+    )
+    tracemalloc.stop()
+
+    lateness_ms = np.array(lateness) * 1000
+    return {
+        "schedule_us": schedule_s / len(reminders) * 1e6,
+        "cancel_us": cancel_s / len(cancels) * 1e6,
+        "memory_mb": memory / (1024 * 1024),
+        "rss_mb": _rss_mb() - baseline_rss,
+        "p50_ms": float(np.percentile(lateness_ms, 50)),
+        "p99_ms": float(np.percentile(lateness_ms, 99)),
+        "max_ms": float(lateness_ms.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reminders", type=int, default=100_000)
+    parser.add_argument("--due", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_phase(args.mode, args.reminders, args.due, args.seed)))
+        return
+
+    print(f"{args.reminders} far-future reminders + {args.due} due in ~3-5s")
+    for mode in MODES:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.reminder_scheduler",
+                "--mode",
+                mode,
+                "--reminders",
+                str(args.reminders),
+                "--due",
+                str(args.due),
+                "--seed",
+                str(args.seed),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        print(
+            f"{mode:>5}: schedule {result['schedule_us']:.1f} us/op, "
+            f"cancel {result['cancel_us']:.2f} us/op, "
+            f"memory {result['memory_mb']:.1f} MB traced (+{result['rss_mb']:.0f} MB RSS), "
+            f"lateness p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+            f"max {result['max_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Compare notes vector backends on synthetic embeddings.
+
+Measures build time, cold-load time (open + first query), query latency
+and RSS for each backend. Every phase runs in a fresh subprocess so RSS and
+cold-load numbers are not polluted by the other backend.
+
+    python -m benchmarks.vector_backends --rows 30000 --dim 384
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = ("chroma", "numpy")
+BATCH_SIZE = 256
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _open_store(backend: str, root: Path):
+    if backend == "chroma":
+        import utils.chroma_client as chroma_client
+
+        chroma_client.CHROMA_PATH = str(root / "chroma")
+        from utils.vector_store import ChromaVectorStore
+
+        return ChromaVectorStore("bench")
+
+    from utils.vector_store import NumpyVectorStore
+
+    return NumpyVectorStore("bench", root=root / "numpy")
+
+
+def _embeddings(rows: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _build(backend: str, root: Path, rows: int, dim: int) -> dict:
+    vectors = _embeddings(rows, dim, seed=0)
+    start = time.perf_counter()
+    store = _open_store(backend, root)
+    for offset in range(0, rows, BATCH_SIZE):
+        batch = vectors[offset : offset + BATCH_SIZE]
+        ids = [f"doc_{offset + i}" for i in range(len(batch))]
+        store.upsert(
+            ids,
+            [f"synthetic chunk {doc_id}" for doc_id in ids],
+            [{"source": f"file_{(offset + i) % 100}.txt"} for i in range(len(batch))],
+            batch,
+        )
+    store.persist()
+    return {"build_s": time.perf_counter() - start}
+
+
+def _query(backend: str, root: Path, dim: int, queries: int, k: int) -> dict:
+    probes = _embeddings(queries, dim, seed=1)
+    baseline_rss = _rss_mb()
+
+    start = time.perf_counter()
+    store = _open_store(backend, root)
+    store.query(probes[0], k)
+    cold_load = time.perf_counter() - start
+
+    latencies = []
+    for probe in probes:
+        start = time.perf_counter()
+        store.query(probe, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "cold_load_s": cold_load,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "rss_mb": _rss_mb() - baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_phase(phase: str, backend: str, root: Path, args) -> dict:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.vector_backends",
+            "--phase",
+            phase,
+            "--backend",
+            backend,
+            "--root",
+            str(root),
+            "--rows",
+            str(args.rows),
+            "--dim",
+            str(args.dim),
+            "--queries",
+            str(args.queries),
+            "-k",
+            str(args.k),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=30000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--backend", choices=BACKENDS, action="append")
+    parser.add_argument("--phase", choices=("build", "query"), help=argparse.SUPPRESS)
+    parser.add_argument("--root", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase == "build":
+        print(json.dumps(_build(args.backend[0], args.root, args.rows, args.dim)))
+        return
+    if args.phase == "query":
+        print(json.dumps(_query(args.backend[0], args.root, args.dim, args.queries, args.k)))
+        return
+
+    backends = args.backend or BACKENDS
+    print(f"{args.rows} rows x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print(
+        f"{'backend':<8} {'build s':>9} {'cold s':>8} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'RSS MB':>8} {'peak MB':>8}"
+    )
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            build = _run_phase("build", backend, root, args)
+            query = _run_phase("query", backend, root, args)
+        print(
+            f"{backend:<8} {build['build_s']:>9.2f} {query['cold_load_s']:>8.3f} "
+            f"{query['p50_ms']:>8.2f} {query['p99_ms']:>8.2f} "
+            f"{query['rss_mb']:>8.1f} {query['peak_rss_mb']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from discord.ext import commands
 
 import history
 from utils.ai import generate_quiz_question, summarize_channel
+from utils.executors import run_in_executor
 
 logger = logging.getLogger(__name__)
 
@@ -81,7 +82,7 @@ class GeneralCog(commands.Cog):
                 await ctx.send("No messages found to summarize")
                 return
 
-            summary_text = summarize_channel(messages)
+            summary_text = await run_in_executor("ai", summarize_channel, messages)
             await ctx.send(
                 f"**Channel Summary ({len(messages)} messages analyzed):**\n{summary_text}"
             )
@@ -117,7 +118,7 @@ class GeneralCog(commands.Cog):
         loading_msg = await ctx.send(f"Generating a **{level.upper()} {category}** question...")
 
         try:
-            q_data = await asyncio.to_thread(generate_quiz_question, level, category)
+            q_data = await run_in_executor("ai", generate_quiz_question, level, category)
 
             if not q_data or 'question' not in q_data:
                 raise ValueError("Incomplete data received from AI")
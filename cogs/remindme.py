@@ -1,15 +1,37 @@
 import asyncio
 import logging
+import os
 import re
-from datetime import datetime, timedelta, timezone
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone, tzinfo
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from discord.ext import commands
 
 import db
+from utils.messages import split_message
+from utils.recurrence import CronRule, IntervalRule
+from utils.scheduler import ChannelDeliveryQueue, Reminder, ReminderScheduler
 
 logger = logging.getLogger(__name__)
 
+# Only reminders due within this window are held in memory; later ones are
+# paged in from Postgres as the window advances.
+REMINDER_WINDOW = timedelta(hours=1)
+WINDOW_REFRESH_SECONDS = 300
+# A claimed reminder not delivered (and deleted) within the lease, e.g. because
+# its instance crashed, becomes claimable by another instance again. The lease
+# is renewed right before each batch is sent.
+CLAIM_LEASE = timedelta(minutes=5)
+CLAIM_BATCH_SIZE = 100
+# Reminders for one channel falling due within this many seconds of each
+# other go out as one message; sends to a channel are at least
+# CHANNEL_SEND_INTERVAL apart.
+REMINDER_COALESCE_SECONDS = 2.0
+CHANNEL_SEND_INTERVAL = 1.0
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
 _COUNTDOWN_RE = re.compile(
     r"^(?:(?P<days>\d+)d)?(?:(?P<hours>\d+)h)?(?:(?P<minutes>\d+)m)?(?:(?P<seconds>\d+)s)?$",
     re.IGNORECASE,
@@ -57,27 +79,29 @@ _FIXED_OFFSET_HOURS = {
 }
 
 
-def _to_utc_from_local_string(dt_str: str, tz_token: str) -> datetime | None:
+def _resolve_zone(tz_token: str) -> tzinfo | None:
     tz_key = tz_token.upper()
-    tz_name = _TZ_ABBREVS.get(tz_key, tz_token)
-    if len(dt_str) == 16:
-        dt_str = f"{dt_str}:00"
-    naive = datetime.fromisoformat(dt_str)
-
     try:
-        local = naive.replace(tzinfo=ZoneInfo(tz_name))
-        return local.astimezone(timezone.utc)
-    except ZoneInfoNotFoundError:
+        return ZoneInfo(_TZ_ABBREVS.get(tz_key, tz_token))
+    except (ZoneInfoNotFoundError, ValueError):
         pass
 
     offset_hours = _FIXED_OFFSET_HOURS.get(tz_key)
     if offset_hours is not None:
-        local = naive.replace(tzinfo=timezone(timedelta(hours=offset_hours)))
-        return local.astimezone(timezone.utc)
-
+        return timezone(timedelta(hours=offset_hours))
     return None
 
 
+def _to_utc_from_local_string(dt_str: str, tz_token: str) -> datetime | None:
+    zone = _resolve_zone(tz_token)
+    if zone is None:
+        return None
+    if len(dt_str) == 16:
+        dt_str = f"{dt_str}:00"
+    naive = datetime.fromisoformat(dt_str)
+    return naive.replace(tzinfo=zone).astimezone(timezone.utc)
+
+
 def parse_countdown(value: str) -> timedelta | None:
     match = _COUNTDOWN_RE.fullmatch(value.strip())
     if not match:
@@ -129,6 +153,34 @@ def parse_remind_time(value: str) -> datetime | None:
     return None
 
 
+def parse_recurrence(recurrence: str, recurrence_tz: str | None = None):
+    """Build the rule for a stored recurrence: a countdown interval or a cron expression.
+
+    Raises ValueError if the rule or its timezone is invalid.
+    """
+    interval = parse_countdown(recurrence)
+    if interval is not None:
+        return IntervalRule(interval)
+    zone = _resolve_zone(recurrence_tz or "UTC")
+    if zone is None:
+        raise ValueError(f"Unknown timezone: {recurrence_tz}")
+    return CronRule(recurrence, zone)
+
+
+def split_recurrence_rule(rule: str) -> tuple[str, str | None]:
+    """Split "0 16 * * SAT PDT" into the cron expression and its timezone token."""
+    fields = rule.split()
+    if len(fields) == 6:
+        return " ".join(fields[:5]), fields[5]
+    return " ".join(fields), None
+
+
+def describe_recurrence(recurrence: str, recurrence_tz: str | None) -> str:
+    if parse_countdown(recurrence) is not None:
+        return f"every {recurrence}"
+    return f"`{recurrence}` {recurrence_tz or 'UTC'}"
+
+
 def discord_timestamp(dt: datetime, style: str = "R") -> str:
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
@@ -137,16 +189,41 @@ def discord_timestamp(dt: datetime, style: str = "R") -> str:
     return f"<t:{int(dt.timestamp())}:{style}>"
 
 
+def format_reminders(reminders) -> str:
+    """One line per distinct message, mentioning everyone it is for."""
+    recipients: dict[str, list[int]] = {}
+    for reminder in reminders:
+        users = recipients.setdefault(reminder.message, [])
+        if reminder.user_id not in users:
+            users.append(reminder.user_id)
+    return "\n".join(
+        f"{' '.join(f'<@{user_id}>' for user_id in users)} **Reminder:** {message}"
+        for message, users in recipients.items()
+    )
+
+
 class RemindMeCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self._tasks: dict[int, asyncio.Task] = {}
+        self.scheduler = ReminderScheduler(self._fire)
+        self.delivery = ChannelDeliveryQueue(
+            self._send_batch, REMINDER_COALESCE_SECONDS, CHANNEL_SEND_INTERVAL
+        )
         self._restored = False
+        self._loaded_until: datetime | None = None
+        self._window_task: asyncio.Task | None = None
+        self._listener = None
 
-    def cog_unload(self):
-        for task in self._tasks.values():
-            task.cancel()
-        self._tasks.clear()
+    async def cog_load(self):
+        self.scheduler.start()
+
+    async def cog_unload(self):
+        if self._window_task is not None:
+            self._window_task.cancel()
+        if self._listener is not None:
+            await self._listener.close()
+        await self.scheduler.stop()
+        await self.delivery.close()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -155,73 +232,152 @@ class RemindMeCog(commands.Cog):
         for _ in range(20):
             if db.pool is not None:
                 self._restored = True
-                await self._restore_reminders()
+                self._window_task = asyncio.create_task(self._window_loop())
                 return
             await asyncio.sleep(0.25)
         logger.warning("RemindMe: database pool not ready; reminders not restored")
 
-    async def _restore_reminders(self):
-        rows = await db.get_all_reminders()
-        for row in rows:
-            if row["id"] in self._tasks:
-                continue
-            remind_at = row["remind_at"]
-            if remind_at.tzinfo is None:
-                remind_at = remind_at.replace(tzinfo=timezone.utc)
-            else:
-                remind_at = remind_at.astimezone(timezone.utc)
-            self._schedule(
-                row["id"],
-                row["channel_id"],
-                row["user_id"],
-                row["message"],
-                remind_at,
-            )
-        if rows:
-            logger.info("Restored %d reminder(s) from database", len(rows))
+    async def _window_loop(self):
+        while True:
+            try:
+                await self._ensure_listener()
+                await self._load_window()
+                # Sweep up anything overdue that no instance delivered,
+                # e.g. claimed by an instance that crashed
+                await self._fire([])
+            except Exception:
+                logger.exception("Failed to load upcoming reminders")
+            await asyncio.sleep(WINDOW_REFRESH_SECONDS)
+
+    async def _ensure_listener(self):
+        if self._listener is None or self._listener.is_closed():
+            self._listener = await db.listen_for_reminders(self._on_reminder_added)
 
-    def _schedule(self, reminder_id, channel_id, user_id, message, remind_at: datetime):
-        if reminder_id in self._tasks:
+    def _on_reminder_added(self, payload: str):
+        """NOTIFY from any instance: wake up for reminders inside our window."""
+        try:
+            reminder_id, timestamp = payload.split(":")
+            reminder_id = int(reminder_id)
+            remind_at = datetime.fromtimestamp(float(timestamp), timezone.utc)
+        except ValueError:
+            logger.warning("Ignoring malformed reminder notification %r", payload)
             return
+        if reminder_id in self.scheduler:
+            return
+        if self._loaded_until is not None and remind_at < self._loaded_until:
+            # Only the due time matters here; the row is read when claimed
+            self.scheduler.schedule(Reminder(reminder_id, None, None, None, remind_at))
+
+    async def _load_window(self):
+        """Schedule reminders due before now + REMINDER_WINDOW not yet in memory."""
+        since = self._loaded_until
+        until = datetime.now(timezone.utc) + REMINDER_WINDOW
+        # Advance first so reminders created during the query are scheduled by
+        # !remindme itself; one seen by both is deduplicated by id.
+        self._loaded_until = until
+        try:
+            rows = await db.get_reminders_due_before(until, since=since)
+        except Exception:
+            self._loaded_until = since
+            raise
 
-        async def _fire():
-            try:
-                delay = (remind_at - datetime.now(timezone.utc)).total_seconds()
-                if delay > 0:
-                    await asyncio.sleep(delay)
-                await self._deliver(channel_id, user_id, message)
-            except asyncio.CancelledError:
-                raise
-            except Exception:
-                logger.exception("Failed to deliver reminder %s", reminder_id)
-            finally:
+        for row in rows:
+            self.scheduler.schedule(Reminder.from_row(row))
+        if since is None and rows:
+            logger.info("Restored %d reminder(s) due within the window", len(rows))
+
+    async def _fire(self, reminders):
+        """Claim and deliver due reminders.
+
+        The in-memory schedule only says when to wake up. Every instance wakes
+        for the same rows, but only the one whose claim succeeds delivers them.
+        """
+        reminder_ids = [reminder.id for reminder in reminders]
+        while True:
+            rows = await db.claim_due_reminders(
+                INSTANCE_ID,
+                CLAIM_LEASE,
+                reminder_ids,
+                limit=CLAIM_BATCH_SIZE,
+                due_before=datetime.now(timezone.utc),
+            )
+            for row in rows:
+                self._deliver_claimed(Reminder.from_row(row))
+            if len(rows) < CLAIM_BATCH_SIZE:
+                return
+            reminder_ids = []
+
+    def _deliver_claimed(self, reminder):
+        self.scheduler.cancel(reminder.id)
+        self.delivery.put(reminder)
+
+    async def _send_batch(self, channel_id, reminders):
+        """Send a channel's due reminders as few messages as possible.
+
+        One-off reminders are then deleted; recurring ones are moved to their
+        next fire time in place.
+        """
+        # Coalescing and pacing can hold a batch past the lease taken when it
+        # fell due, so renew the claims and drop any another instance now owns.
+        held = await db.renew_reminder_claims(
+            INSTANCE_ID, CLAIM_LEASE, [reminder.id for reminder in reminders]
+        )
+        if len(held) < len(reminders):
+            logger.warning(
+                "Lost the claim on %d reminder(s) for channel %s before sending",
+                len(reminders) - len(held),
+                channel_id,
+            )
+            reminders = [reminder for reminder in reminders if reminder.id in held]
+            if not reminders:
+                return
+
+        try:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
                 try:
-                    await db.delete_reminder(reminder_id)
+                    channel = await self.bot.fetch_channel(channel_id)
                 except Exception:
-                    logger.exception(
-                        "Failed to delete reminder %s from database", reminder_id
-                    )
-                self._tasks.pop(reminder_id, None)
+                    logger.warning("Reminder channel %s not found", channel_id)
+                    return
 
-        self._tasks[reminder_id] = asyncio.create_task(_fire())
+            for chunk in split_message(format_reminders(reminders)):
+                await channel.send(chunk)
+        finally:
+            await self._finish(reminders)
 
-    async def _deliver(self, channel_id, user_id, message):
-        channel = self.bot.get_channel(channel_id)
-        if channel is None:
+    async def _finish(self, reminders):
+        now = datetime.now(timezone.utc)
+        finished, advanced = [], []
+        for reminder in reminders:
+            if reminder.recurrence is None:
+                finished.append(reminder.id)
+                continue
             try:
-                channel = await self.bot.fetch_channel(channel_id)
-            except Exception:
-                logger.warning("Reminder channel %s not found", channel_id)
-                return
+                rule = parse_recurrence(reminder.recurrence, reminder.recurrence_tz)
+                reminder.remind_at = rule.next_after(reminder.remind_at, now)
+            except ValueError as e:
+                logger.warning("Dropping recurring reminder %s: %s", reminder.id, e)
+                finished.append(reminder.id)
+                continue
+            advanced.append(reminder)
 
-        mention = f"<@{user_id}>"
         try:
-            user = await self.bot.fetch_user(user_id)
-            mention = user.mention
+            if finished:
+                await db.delete_reminders(finished)
+            if advanced:
+                await db.advance_reminders(
+                    (reminder.id, reminder.remind_at) for reminder in advanced
+                )
         except Exception:
-            pass
+            logger.exception(
+                "Failed to update %d delivered reminder(s) in database", len(reminders)
+            )
+            return
 
-        await channel.send(f"{mention} **Reminder:** {message}")
+        for reminder in advanced:
+            if self._loaded_until is not None and reminder.remind_at < self._loaded_until:
+                self.scheduler.schedule(reminder)
 
     async def _user_label(self, user_id: int, guild) -> str:
         if guild:
@@ -277,16 +433,85 @@ class RemindMeCog(commands.Cog):
             message,
             remind_at,
         )
-        self._schedule(
-            reminder_id,
-            ctx.channel.id,
+        if self._loaded_until is not None and remind_at < self._loaded_until:
+            self.scheduler.schedule(
+                Reminder(reminder_id, ctx.author.id, ctx.channel.id, message, remind_at)
+            )
+
+        when = discord_timestamp(remind_at)
+        await ctx.send(f"Got it — I'll remind you {when}: **{message}**")
+
+    @commands.command(
+        name="remindevery",
+        help='Set a recurring reminder: !remindevery <interval or "cron rule"> <message> '
+        '(e.g. 1d or "0 16 * * SAT PDT")',
+    )
+    async def remindevery(self, ctx, *, args: str):
+        args = args.strip()
+        if args.startswith('"'):
+            end = args.find('"', 1)
+            rule_text, message = (args[1:end], args[end + 1 :]) if end > 0 else ("", "")
+        else:
+            rule_text, _, message = args.partition(" ")
+        message = message.strip()
+        if not rule_text or not message:
+            await ctx.send(
+                "Usage: `!remindevery <rule> <message>`\n"
+                "The rule is an interval (`1d`, `12h`, `1d12h`) or a quoted cron expression "
+                "with an optional timezone (`\"0 16 * * SAT PDT\"` = Saturdays at 16:00 PDT)."
+            )
+            return
+
+        recurrence, recurrence_tz = split_recurrence_rule(rule_text)
+        try:
+            rule = parse_recurrence(recurrence, recurrence_tz)
+            now = datetime.now(timezone.utc)
+            if isinstance(rule, IntervalRule):
+                remind_at = now + rule.interval
+            else:
+                remind_at = rule.next_after(now, now)
+        except ValueError as e:
+            await ctx.send(f"Could not use that rule: {e}")
+            return
+
+        reminder_id = await db.add_reminder(
             ctx.author.id,
+            ctx.channel.id,
             message,
             remind_at,
+            recurrence=recurrence,
+            recurrence_tz=recurrence_tz,
         )
+        if self._loaded_until is not None and remind_at < self._loaded_until:
+            self.scheduler.schedule(
+                Reminder(
+                    reminder_id,
+                    ctx.author.id,
+                    ctx.channel.id,
+                    message,
+                    remind_at,
+                    recurrence,
+                    recurrence_tz,
+                )
+            )
 
         when = discord_timestamp(remind_at)
-        await ctx.send(f"Got it — I'll remind you {when}: **{message}**")
+        schedule = describe_recurrence(recurrence, recurrence_tz)
+        await ctx.send(
+            f"Got it — I'll remind you {schedule}, starting {when}: **{message}** "
+            f"(cancel with `!remindcancel {reminder_id}`)"
+        )
+
+    @commands.command(
+        name="remindcancel",
+        help="Cancel one of your reminders by its number from !timers",
+    )
+    async def remindcancel(self, ctx, reminder_id: int):
+        if not await db.delete_user_reminder(reminder_id, ctx.author.id):
+            await ctx.send(f"You have no reminder #{reminder_id}.")
+            return
+        self.scheduler.cancel(reminder_id)
+        await ctx.send(f"Cancelled reminder #{reminder_id}.")
 
     @commands.command(
         name="timers",
@@ -299,8 +524,8 @@ class RemindMeCog(commands.Cog):
             return
 
         lines = ["**Upcoming reminders**"]
-        for i, row in enumerate(rows, start=1):
-            remind_at = row["remind_at"]
+        for row in rows:
+            remind_at = row["next_fire_at"]
             if remind_at.tzinfo is None:
                 remind_at = remind_at.replace(tzinfo=timezone.utc)
             else:
@@ -309,8 +534,11 @@ class RemindMeCog(commands.Cog):
             when = discord_timestamp(remind_at)
             user = await self._user_label(row["user_id"], ctx.guild)
             channel = f"<#{row['channel_id']}>"
+            repeats = ""
+            if row["recurrence"] is not None:
+                repeats = f", repeats {describe_recurrence(row['recurrence'], row['recurrence_tz'])}"
             lines.append(
-                f"{i}. {when} — **{row['message']}** ({user}, {channel})"
+                f"#{row['id']} {when} — **{row['message']}** ({user}, {channel}{repeats})"
             )
 
         await ctx.send("\n".join(lines))
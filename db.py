@@ -6,6 +6,8 @@ import asyncpg
 
 pool = None
 
+REMINDERS_CHANNEL = "reminders_changed"
+
 
 async def init_db():
     global pool
@@ -33,6 +35,24 @@ async def init_db():
                 created_at TIMESTAMPTZ DEFAULT NOW()
             )
         """)
+        # remind_at is when the reminder was first set for; next_fire_at is
+        # the next delivery, advanced in place for recurring reminders.
+        await conn.execute("""
+            ALTER TABLE reminders
+                ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+                ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMPTZ,
+                ADD COLUMN IF NOT EXISTS recurrence TEXT,
+                ADD COLUMN IF NOT EXISTS recurrence_tz TEXT,
+                ADD COLUMN IF NOT EXISTS next_fire_at TIMESTAMPTZ
+        """)
+        await conn.execute(
+            "UPDATE reminders SET next_fire_at = remind_at WHERE next_fire_at IS NULL"
+        )
+        await conn.execute("DROP INDEX IF EXISTS reminders_remind_at_idx")
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS reminders_next_fire_at_idx "
+            "ON reminders (next_fire_at)"
+        )
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS tasklists (
                 message_id BIGINT PRIMARY KEY,
@@ -56,6 +76,13 @@ async def init_db():
                 created_at TIMESTAMPTZ DEFAULT NOW()
             )
         """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS video_analyses (
+                video_id TEXT PRIMARY KEY,
+                analysis TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
 
 
 async def add_quote(key, value):
@@ -93,29 +120,157 @@ async def get_quote_by_key(key):
         return row["value"] if row else None
 
 
-async def add_reminder(user_id, channel_id, message, remind_at):
+async def _notify_reminder(conn, reminder_id, next_fire_at):
+    # Delivered on commit; lets other bot instances wake up for it
+    await conn.execute(
+        "SELECT pg_notify($1, $2)",
+        REMINDERS_CHANNEL,
+        f"{reminder_id}:{next_fire_at.timestamp()}",
+    )
+
+
+async def add_reminder(
+    user_id, channel_id, message, remind_at, recurrence=None, recurrence_tz=None
+):
     async with pool.acquire() as conn:
-        return await conn.fetchval(
+        async with conn.transaction():
+            reminder_id = await conn.fetchval(
+                """
+                INSERT INTO reminders
+                    (user_id, channel_id, message, remind_at, next_fire_at,
+                     recurrence, recurrence_tz)
+                VALUES ($1, $2, $3, $4, $4, $5, $6)
+                RETURNING id
+                """,
+                user_id,
+                channel_id,
+                message,
+                remind_at,
+                recurrence,
+                recurrence_tz,
+            )
+            await _notify_reminder(conn, reminder_id, remind_at)
+        return reminder_id
+
+
+async def advance_reminders(next_fire_times):
+    """Move recurring reminders to their next fire time and release the claim.
+
+    next_fire_times is an iterable of (reminder_id, next_fire_at).
+    """
+    next_fire_times = list(next_fire_times)
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.executemany(
+                """
+                UPDATE reminders
+                SET next_fire_at = $2, claimed_by = NULL, claimed_until = NULL
+                WHERE id = $1
+                """,
+                next_fire_times,
+            )
+            for reminder_id, next_fire_at in next_fire_times:
+                await _notify_reminder(conn, reminder_id, next_fire_at)
+
+
+async def claim_due_reminders(owner, lease, reminder_ids=(), limit=100, due_before=None):
+    """Atomically claim due reminders for delivery by this instance.
+
+    Claims every unclaimed (or lease-expired) reminder that is overdue by the
+    database clock, or listed in reminder_ids and due before due_before (the
+    caller's clock). SKIP LOCKED lets concurrent instances claim disjoint rows
+    without blocking each other. Checking the due time for listed ids too
+    keeps a late instance from re-claiming a recurring reminder another
+    instance has already delivered and advanced.
+    """
+    async with pool.acquire() as conn:
+        return await conn.fetch(
             """
-            INSERT INTO reminders (user_id, channel_id, message, remind_at)
-            VALUES ($1, $2, $3, $4)
+            WITH due AS (
+                SELECT id FROM reminders
+                WHERE (next_fire_at <= NOW()
+                       OR (id = ANY($2::int[]) AND next_fire_at <= $5))
+                  AND (claimed_until IS NULL OR claimed_until < NOW())
+                ORDER BY next_fire_at
+                LIMIT $4
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE reminders r
+            SET claimed_by = $1, claimed_until = NOW() + $3::interval
+            FROM due
+            WHERE r.id = due.id
+            RETURNING r.*
+            """,
+            owner,
+            list(reminder_ids),
+            lease,
+            limit,
+            due_before,
+        )
+
+
+async def renew_reminder_claims(owner, lease, reminder_ids) -> set[int]:
+    """Extend this instance's claims; returns the ids it still holds.
+
+    A reminder whose lease lapsed and was claimed (or delivered and
+    removed) by another instance is no longer held and must not be sent.
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            UPDATE reminders
+            SET claimed_until = NOW() + $3::interval
+            WHERE id = ANY($2::int[]) AND claimed_by = $1
             RETURNING id
             """,
-            user_id,
-            channel_id,
-            message,
-            remind_at,
+            owner,
+            list(reminder_ids),
+            lease,
         )
+        return {row["id"] for row in rows}
 
 
-async def delete_reminder(reminder_id):
+async def listen_for_reminders(callback):
+    """Open a dedicated connection calling callback(payload) on new reminders."""
+    conn = await asyncpg.connect(dsn=os.getenv("DATABASE_URL"))
+    await conn.add_listener(
+        REMINDERS_CHANNEL, lambda _conn, _pid, _channel, payload: callback(payload)
+    )
+    return conn
+
+
+async def delete_reminders(reminder_ids):
     async with pool.acquire() as conn:
-        await conn.execute("DELETE FROM reminders WHERE id = $1", reminder_id)
+        await conn.execute(
+            "DELETE FROM reminders WHERE id = ANY($1::int[])", list(reminder_ids)
+        )
 
 
-async def get_all_reminders():
+async def delete_user_reminder(reminder_id, user_id):
     async with pool.acquire() as conn:
-        return await conn.fetch("SELECT * FROM reminders ORDER BY remind_at")
+        result = await conn.execute(
+            "DELETE FROM reminders WHERE id = $1 AND user_id = $2", reminder_id, user_id
+        )
+        return result == "DELETE 1"
+
+
+async def get_reminders_due_before(until, since=None):
+    """Reminders with since <= next_fire_at < until (all overdue ones if since is None)."""
+    async with pool.acquire() as conn:
+        if since is None:
+            return await conn.fetch(
+                "SELECT * FROM reminders WHERE next_fire_at < $1 ORDER BY next_fire_at",
+                until,
+            )
+        return await conn.fetch(
+            """
+            SELECT * FROM reminders
+            WHERE next_fire_at >= $1 AND next_fire_at < $2
+            ORDER BY next_fire_at
+            """,
+            since,
+            until,
+        )
 
 
 async def get_upcoming_reminders(limit=5):
@@ -123,8 +278,8 @@ async def get_upcoming_reminders(limit=5):
         return await conn.fetch(
             """
             SELECT * FROM reminders
-            WHERE remind_at > NOW()
-            ORDER BY remind_at
+            WHERE next_fire_at > NOW()
+            ORDER BY next_fire_at
             LIMIT $1
             """,
             limit,
@@ -257,3 +412,38 @@ async def get_all_signup_sheets():
             }
             for row in rows
         ]
+
+
+async def get_video_analysis(video_id, max_age):
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            """
+            SELECT analysis FROM video_analyses
+            WHERE video_id = $1 AND created_at > NOW() - $2::interval
+            """,
+            video_id,
+            max_age,
+        )
+
+
+async def save_video_analysis(video_id, analysis):
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO video_analyses (video_id, analysis)
+            VALUES ($1, $2)
+            ON CONFLICT (video_id) DO UPDATE SET
+                analysis = EXCLUDED.analysis,
+                created_at = NOW()
+            """,
+            video_id,
+            analysis,
+        )
+
+
+async def delete_expired_video_analyses(max_age):
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "DELETE FROM video_analyses WHERE created_at <= NOW() - $1::interval",
+            max_age,
+        )
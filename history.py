@@ -1,5 +1,6 @@
 import logging
 from collections import defaultdict, deque
+from collections.abc import Sequence
 
 from config import MAX_HISTORY
 
@@ -7,22 +8,142 @@ logger = logging.getLogger(__name__)
 
 channel_history = defaultdict(lambda: deque(maxlen=MAX_HISTORY))
 
+
+class HistoryEntry:
+    """One message in a channel's history."""
+
+    __slots__ = ('author', 'content', 'is_bot', 'images', 'videos')
+
+    def __init__(self, author, content, is_bot=False, images=(), videos=()):
+        self.author = author
+        self.content = content
+        self.is_bot = is_bot
+        self.images = images
+        self.videos = videos
+
+    @property
+    def has_media(self):
+        return bool(self.images or self.videos)
+
+    def __repr__(self):
+        return f"HistoryEntry({self.author!r}, {self.content!r}, media={self.has_media})"
+
+
+class HistoryView(Sequence):
+    """Read-only view of a channel's history, oldest first, without copying.
+
+    The view reflects later appends; don't await while iterating it, since
+    a new message arriving in the meantime would mutate the deque.
+    """
+
+    __slots__ = ('_entries',)
+
+    def __init__(self, entries):
+        self._entries = entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        return self._entries[index]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __reversed__(self):
+        return reversed(self._entries)
+
+
+_EMPTY_HISTORY = HistoryView(())
+
+
+class PromptCache:
+    """Pre-rendered prompt parts for a channel, kept in step with its history.
+
+    text_parts holds one {"text": "author: content"} part per text message,
+    oldest first. latest_media is the newest entry with media, which belongs
+    after the first media_index text parts.
+    """
+
+    __slots__ = ('text_parts', 'latest_media', 'media_index')
+
+    def __init__(self):
+        self.text_parts = deque()
+        self.latest_media = None
+        self.media_index = 0
+
+    def append(self, entry):
+        if entry.has_media:
+            self.latest_media = entry
+            self.media_index = len(self.text_parts)
+        else:
+            self.text_parts.append({'text': f"{entry.author}: {entry.content}"})
+
+    def evict(self, entry):
+        """Drop the oldest history entry."""
+        if entry.has_media:
+            # Evicting the oldest entry: if it was the newest media, no media is left
+            if entry is self.latest_media:
+                self.latest_media = None
+                self.media_index = 0
+        else:
+            self.text_parts.popleft()
+            if self.latest_media is not None:
+                self.media_index -= 1
+
+
+prompt_caches = defaultdict(PromptCache)
+
+# One shared record per distinct image content across all channels' history,
+# keyed by SHA-256 digest, with a count of history messages referencing it.
+# Only byte-identical images share a record, so one channel's history never
+# ends up holding a picture that was posted somewhere else.
+media_records = {}
+media_refcounts = {}
+
+
+def _intern_image(image):
+    """Return the stored record with the same content, or store this one."""
+    record = media_records.setdefault(image.digest, image)
+    media_refcounts[image.digest] = media_refcounts.get(image.digest, 0) + 1
+    return record
+
+
+def _release_images(images):
+    for image in images:
+        remaining = media_refcounts.get(image.digest, 0) - 1
+        if remaining > 0:
+            media_refcounts[image.digest] = remaining
+        else:
+            media_refcounts.pop(image.digest, None)
+            media_records.pop(image.digest, None)
+
+
+def _intern_images(images):
+    interned = []
+    for image in images:
+        record = _intern_image(image)
+        if record in interned:
+            _release_images([record])
+        else:
+            interned.append(record)
+    return interned
+
+
 def add_message_to_history(channel_id, author, content, is_bot=False, images=None, videos=None):
     """Add a message to the channel history with optional media content."""
 
-    images = images or []
-    videos = videos or []
+    images = tuple(_intern_images(images)) if images else ()
+    videos = tuple(videos) if videos else ()
 
-    message_data = {
-        'author': author,
-        'content': content,
-        'is_bot': is_bot,
-        'images': images,
-        'videos': videos,
-        'has_media': bool(images or videos),
-    }
-    
-    channel_history[channel_id].append(message_data)
+    history = channel_history[channel_id]
+    prompt_cache = prompt_caches[channel_id]
+    if len(history) == history.maxlen:
+        _release_images(history[0].images)
+        prompt_cache.evict(history[0])
+    entry = HistoryEntry(author, content, is_bot, images, videos)
+    history.append(entry)
+    prompt_cache.append(entry)
 
     media_info = []
     if images:
@@ -33,22 +154,28 @@ def add_message_to_history(channel_id, author, content, is_bot=False, images=Non
     logger.info(f"Message ({len(channel_history[channel_id])}/{MAX_HISTORY}): {channel_id} - {author}, {media_info}")
 
 
-def get_channel_history(channel_id, include_media=False):
-    """Get the message history for a channel."""
+def get_channel_history(channel_id):
+    """Get a read-only view of the message history for a channel."""
     if channel_id not in channel_history:
-        return []
-    
-    if include_media:
-        return list(channel_history[channel_id])
-    else:
-        text_only = []
-        for msg in channel_history[channel_id]:
-            text_only.append({
-                'author': msg['author'],
-                'content': msg['content'],
-                'is_bot': msg.get('is_bot', False)
-            })
-        return text_only
+        return _EMPTY_HISTORY
+    return HistoryView(channel_history[channel_id])
+
+
+def get_context_parts(channel_id, include_media=True):
+    """Return (text_parts, media_entry, media_index) for building a prompt.
+
+    text_parts is a read-only HistoryView of the channel's pre-rendered text
+    parts, so the same rules apply: copy what you need before awaiting.
+    media_entry, if not None, is the latest entry with media and belongs
+    before text_parts[media_index].
+    """
+    prompt_cache = prompt_caches.get(channel_id)
+    if prompt_cache is None:
+        return _EMPTY_HISTORY, None, 0
+    text_parts = HistoryView(prompt_cache.text_parts)
+    if not include_media or prompt_cache.latest_media is None:
+        return text_parts, None, 0
+    return text_parts, prompt_cache.latest_media, prompt_cache.media_index
 
 
 def reset_history(channel_id=None):
@@ -59,13 +186,19 @@ def reset_history(channel_id=None):
     """
     if channel_id is None:
         channel_history.clear()
+        prompt_caches.clear()
+        media_records.clear()
+        media_refcounts.clear()
         logger.info("Cleared all channel histories")
     else:
         if channel_id in channel_history:
+            for msg in channel_history[channel_id]:
+                _release_images(msg.images)
             try:
                 del channel_history[channel_id]
             except Exception:
                 channel_history.pop(channel_id, None)
+            prompt_caches.pop(channel_id, None)
             logger.info(f"Cleared history for channel {channel_id}")
         else:
-            logger.info(f"No history to clear for channel {channel_id}")
\ No newline at end of file
+            logger.info(f"No history to clear for channel {channel_id}")
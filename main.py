@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import sys
+from itertools import islice
 from pathlib import Path
 
 import discord
@@ -9,11 +10,15 @@ from discord.ext import commands
 from dotenv import load_dotenv
 
 from db import get_quote_by_key, init_db
-from history import add_message_to_history, get_channel_history
-from utils.ai import chat_with_ai, convert_pil_to_part, convert_video_to_part
+from history import add_message_to_history, get_context_parts
+from utils.ai import chat_with_ai, convert_image_to_part, convert_video_to_part
+from utils.executors import run_in_executor, shutdown_executors
+from utils.images import dedupe_images
 from utils.links import collect_images_from_message, extract_youtube_urls
 from utils.messages import split_message
-from utils.notes import load_personal_notes, search_personal_notes
+from utils.notes_client import NotesServiceClient, NotesServiceError
+from utils.reply_chain import resolve_reply_chain
+from utils.video_cache import get_video_analyses, prune_video_analyses
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,6 +30,7 @@ logger = logging.getLogger("parurubot")
 load_dotenv()
 
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+NOTES_SERVICE_ADDRESS = os.getenv("NOTES_SERVICE_ADDRESS")
 
 MAX_IMAGES = 10
 MAX_VIDEOS = 1
@@ -34,11 +40,17 @@ intents = discord.Intents.default()
 intents.message_content = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
+notes_client = (
+    NotesServiceClient(NOTES_SERVICE_ADDRESS) if NOTES_SERVICE_ADDRESS else None
+)
+notes_task = None
+notes_watcher = None
 
 
 @bot.event
 async def on_ready():
     """Called when the bot is ready and connected"""
+    global notes_task
     logger.info(f"Logged in as {bot.user}")
 
     try:
@@ -50,8 +62,13 @@ async def on_ready():
 
         sys.exit(1)
 
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(None, load_personal_notes)
+    try:
+        await prune_video_analyses()
+    except Exception as e:
+        logger.warning(f"Could not prune expired video analyses: {e}")
+
+    if notes_task is None and notes_client is None:
+        notes_task = asyncio.create_task(load_notes_in_background())
 
     server_count = len(bot.guilds)
     for server in bot.guilds:
@@ -112,6 +129,45 @@ async def on_message(message):
         )
 
 
+async def load_notes_in_background():
+    """Warm up the embedding model, index notes, then start watching for changes"""
+    global notes_watcher
+    # Imported here so bots using the notes service never load the index or model
+    from utils.notes import load_personal_notes, warmup_embedding_model
+    from utils.notes_watcher import NotesWatcher
+
+    try:
+        await run_in_executor("ingestion", warmup_embedding_model)
+        await run_in_executor("ingestion", load_personal_notes)
+        notes_watcher = NotesWatcher()
+        notes_watcher.start()
+    except Exception as e:
+        logger.exception(f"Failed to load personal notes: {e}")
+
+
+async def search_notes(query, n_results, namespace=None):
+    """Search notes through the notes service if configured, otherwise in-process"""
+    if notes_client is None:
+        from utils.notes import search_personal_notes_async
+
+        return await search_personal_notes_async(
+            query, n_results=n_results, namespace=namespace
+        )
+
+    try:
+        return await notes_client.search(query, n_results=n_results, namespace=namespace)
+    except (OSError, asyncio.TimeoutError, NotesServiceError) as e:
+        logger.warning(f"Notes service unavailable, skipping notes: {e}")
+        return None
+
+
+async def get_video_context(urls):
+    """Cached analyses for the given YouTube URLs; videos without one are sent as-is"""
+    if not urls:
+        return {}
+    return await get_video_analyses(urls)
+
+
 async def handle_ai_chat(message):
     """Handle AI chat messages starting with 'paruru, '"""
     cleaned_content = message.content[8:].strip()
@@ -122,34 +178,25 @@ async def handle_ai_chat(message):
         current_images = []
         current_videos = []
 
-        """Check current message"""
+        """Check current message and the messages it replies to"""
         urls, stripped_text = extract_youtube_urls(cleaned_content)
         current_videos.extend(urls)
-        current_images.extend(
-            await collect_images_from_message(stripped_text, message.attachments)
+        message_images, reply_chain = await asyncio.gather(
+            collect_images_from_message(stripped_text, message.attachments),
+            resolve_reply_chain(message),
         )
-
-        """Check replied message"""
-        if message.reference:
-            try:
-                replied_msg = message.reference.resolved
-                if replied_msg is None:
-                    replied_msg = await message.channel.fetch_message(
-                        message.reference.message_id
-                    )
-                urls, stripped_text = extract_youtube_urls(replied_msg.content)
-                current_videos.extend(urls)
-                current_images.extend(
-                    await collect_images_from_message(
-                        stripped_text, replied_msg.attachments
-                    )
-                )
-            except discord.NotFound:
-                logger.warning("Replied message not found, skipping reply context")
-            except discord.HTTPException as e:
-                logger.warning(f"Could not fetch replied message: {e}")
+        current_images.extend(message_images)
+        for replied in reply_chain:
+            current_videos.extend(replied.videos)
+            current_images.extend(replied.images)
 
         if current_images:
+            unique_images = dedupe_images(current_images)
+            if len(unique_images) < len(current_images):
+                logger.info(
+                    f"Dropped {len(current_images) - len(unique_images)} duplicate image(s)"
+                )
+            current_images = unique_images
             logger.info(f"Found {len(current_images)} images")
 
         if current_videos:
@@ -169,43 +216,48 @@ async def handle_ai_chat(message):
             )
             current_videos = current_videos[:MAX_VIDEOS]
 
-        history_messages = get_channel_history(channel_id, include_media=True)
+        text_parts, media_entry, media_index = get_context_parts(
+            channel_id, include_media=not (current_images or current_videos)
+        )
         history_context = ""
 
-        if history_messages:
+        if text_parts or media_entry:
+            # Take the text parts out of the view before awaiting anything
             conversation_parts = [{"text": "Here's the recent conversation context:"}]
-            skip_history_media = bool(current_images or current_videos)
-            last_media_index = None
-            if not skip_history_media:
-                last_media_index = next(
-                    (
-                        i
-                        for i in range(len(history_messages) - 1, -1, -1)
-                        if history_messages[i]["has_media"]
-                    ),
-                    None,
+            conversation_parts.extend(islice(text_parts, media_index))
+            media_at = len(conversation_parts)
+            conversation_parts.extend(islice(text_parts, media_index, None))
+
+            if media_entry:
+                history_analyses = await get_video_context(media_entry.videos)
+                media_parts = [{"text": f"{media_entry.author} shared media:"}]
+                media_parts.extend(convert_image_to_part(img) for img in media_entry.images)
+                media_parts.extend(
+                    convert_video_to_part(vid, history_analyses.get(vid))
+                    for vid in media_entry.videos
                 )
-
-            for i, msg in enumerate(history_messages):
-                if msg["has_media"]:
-                    if skip_history_media or i != last_media_index:
-                        continue
-
-                    conversation_parts.append(
-                        {"text": f"{msg['author']} shared media:"}
-                    )
-                    for img in msg["images"]:
-                        conversation_parts.append(convert_pil_to_part(img))
-                    for vid in msg["videos"]:
-                        conversation_parts.append(convert_video_to_part(vid))
-                else:
-                    conversation_parts.append(
-                        {"text": f"{msg['author']}: {msg['content']}"}
-                    )
-
+                conversation_parts[media_at:media_at] = media_parts
             history_context = {"role": "user", "parts": conversation_parts}
 
-        relevant_notes = search_personal_notes(cleaned_content, n_results=2)
+        reply_parts = [
+            {"text": f"{replied.author}: {replied.content}"}
+            for replied in reply_chain
+            if replied.content
+        ]
+        if reply_parts:
+            reply_parts.insert(
+                0, {"text": "The new message replies to this thread (nearest first):"}
+            )
+            if history_context:
+                history_context["parts"].extend(reply_parts)
+            else:
+                history_context = {"role": "user", "parts": reply_parts}
+
+        relevant_notes = await search_notes(
+            cleaned_content,
+            n_results=2,
+            namespace=message.guild.id if message.guild else None,
+        )
         notes_context = ""
         if relevant_notes:
             notes_context = (
@@ -214,15 +266,18 @@ async def handle_ai_chat(message):
             logger.info("Found relevant notes for this query")
 
         async with message.channel.typing():
+            video_analyses = await get_video_context(current_videos)
             try:
                 response_text = await asyncio.wait_for(
-                    asyncio.to_thread(
+                    run_in_executor(
+                        "ai",
                         chat_with_ai,
                         cleaned_content,
                         history_context,
                         notes_context,
                         current_images,
                         current_videos,
+                        video_analyses,
                     ),
                     timeout=AI_TIMEOUT,
                 )
@@ -275,9 +330,14 @@ async def load_cogs():
 
 
 async def main():
-    async with bot:
-        await load_cogs()
-        await bot.start(DISCORD_TOKEN)
+    try:
+        async with bot:
+            await load_cogs()
+            await bot.start(DISCORD_TOKEN)
+    finally:
+        if notes_client is not None:
+            await notes_client.close()
+        shutdown_executors()
 
 
 if __name__ == "__main__":
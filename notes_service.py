@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from utils.executors import executor_stats, run_in_executor
+from utils.notes import (
+    get_index_generation,
+    get_load_progress,
+    load_personal_notes,
+    note_relative_path,
+    notes_ready,
+    reindex_note_files,
+    search_personal_notes_async,
+    warmup_embedding_model,
+)
+from utils.notes_client import DEFAULT_ADDRESS, STREAM_LIMIT, parse_address
+from utils.notes_watcher import NotesWatcher
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+logger = logging.getLogger("notes_service")
+
+load_dotenv()
+
+NOTES_SERVICE_ADDRESS = os.getenv("NOTES_SERVICE_ADDRESS", DEFAULT_ADDRESS)
+
+notes_watcher = NotesWatcher()
+
+
+async def handle_search(args):
+    return await search_personal_notes_async(
+        args["query"],
+        args.get("n_results", 3),
+        namespace=args.get("namespace"),
+        source=args.get("source"),
+        note_type=args.get("note_type"),
+    )
+
+
+async def handle_status(args):
+    return {
+        "ready": notes_ready(),
+        "generation": get_index_generation(),
+        **get_load_progress(),
+        "executors": executor_stats(),
+    }
+
+
+async def handle_reindex(args):
+    # Paths come from the socket, so refuse anything outside the notes folder
+    paths = [note_relative_path(path) for path in args.get("paths", [])]
+    return await run_in_executor("ingestion", reindex_note_files, paths)
+
+
+HANDLERS = {
+    "search": handle_search,
+    "status": handle_status,
+    "reindex": handle_reindex,
+}
+
+
+async def handle_connection(reader, writer):
+    """Serve newline-delimited JSON requests, one at a time per connection"""
+    try:
+        while line := await reader.readline():
+            response = {"ok": False}
+            try:
+                request = json.loads(line)
+                response["id"] = request.get("id")
+                handler = HANDLERS.get(request.get("op"))
+                if handler is None:
+                    response["error"] = f"unknown op: {request.get('op')}"
+                else:
+                    response["result"] = await handler(request.get("args") or {})
+                    response["ok"] = True
+            except Exception as e:
+                logger.exception(f"Error handling notes request: {e}")
+                response["error"] = str(e)
+
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def load_notes():
+    await run_in_executor("ingestion", warmup_embedding_model)
+    await run_in_executor("ingestion", load_personal_notes)
+    notes_watcher.start()
+
+
+async def main():
+    kind, target = parse_address(NOTES_SERVICE_ADDRESS)
+    if kind == "unix":
+        Path(target).unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(
+            handle_connection, target, limit=STREAM_LIMIT
+        )
+    else:
+        host, port = target
+        server = await asyncio.start_server(
+            handle_connection, host, port, limit=STREAM_LIMIT
+        )
+
+    logger.info(f"Notes service listening on {NOTES_SERVICE_ADDRESS}")
+    loader = asyncio.create_task(load_notes())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        loader.cancel()
+        await notes_watcher.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Notes service stopped by user.")
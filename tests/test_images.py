@@ -0,0 +1,63 @@
+import io
+import unittest
+
+from PIL import Image, ImageDraw
+
+from utils.images import dedupe_images, is_duplicate, prepare_image
+
+
+def chat_screenshot(lines, size=(1200, 800)):
+    """A dark-theme chat screenshot: one avatar, name and message per row."""
+    image = Image.new("RGB", size, (54, 57, 63))
+    draw = ImageDraw.Draw(image)
+    for i, text in enumerate(lines):
+        y = 40 + i * 90
+        draw.ellipse((30, y, 90, y + 60), fill=(88, 101, 242))
+        draw.text((110, y + 5), "someone", fill=(255, 255, 255))
+        draw.text((110, y + 30), text, fill=(220, 221, 222))
+    return image
+
+
+def encode(image, format="PNG", **params):
+    output = io.BytesIO()
+    image.save(output, format=format, **params)
+    return output.getvalue()
+
+
+class DuplicateImageTest(unittest.TestCase):
+    def setUp(self):
+        self.screenshot = chat_screenshot(
+            [f"message number {i} about lunch plans" for i in range(8)]
+        )
+
+    def test_same_layout_screenshots_are_not_duplicates(self):
+        other = chat_screenshot(
+            [f"totally different words in line {i}!!" for i in range(8)]
+        )
+        first = prepare_image(encode(self.screenshot))
+        second = prepare_image(encode(other))
+        self.assertFalse(is_duplicate(first, second))
+        self.assertEqual(len(dedupe_images([first, second])), 2)
+
+    def test_identical_content_is_duplicate(self):
+        data = encode(self.screenshot)
+        first, second = prepare_image(data), prepare_image(data)
+        self.assertEqual(first.digest, second.digest)
+        self.assertEqual(dedupe_images([first, second]), [first])
+
+    def test_rescaled_copy_is_duplicate(self):
+        smaller = self.screenshot.resize((600, 400))
+        original = prepare_image(encode(self.screenshot))
+        copy = prepare_image(encode(smaller, "JPEG", quality=60))
+        self.assertNotEqual(original.digest, copy.digest)
+        self.assertTrue(is_duplicate(original, copy))
+
+    def test_different_aspect_ratio_is_not_duplicate(self):
+        cropped = self.screenshot.crop((0, 0, 1200, 600))
+        original = prepare_image(encode(self.screenshot))
+        crop = prepare_image(encode(cropped))
+        self.assertFalse(is_duplicate(original, crop))
+
+
+if __name__ == "__main__":
+    unittest.main()
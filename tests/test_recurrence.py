@@ -0,0 +1,54 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from utils.recurrence import CronRule, IntervalRule
+
+LOS_ANGELES = ZoneInfo("America/Los_Angeles")
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class CronRuleDstTest(unittest.TestCase):
+    def test_repeated_hour_fires_once_and_never_in_the_past(self):
+        # Clocks go back at 09:00 UTC on 2026-11-01; 01:50 local happens twice
+        rule = CronRule("50 1 * * *", LOS_ANGELES)
+        now = utc(2026, 11, 1, 9, 20)
+        fire_at = rule.next_after(now, now)
+        self.assertGreater(fire_at, now)
+        self.assertEqual(fire_at, utc(2026, 11, 2, 9, 50))
+
+        first = rule.next_after(utc(2026, 11, 1, 8, 0), utc(2026, 11, 1, 8, 0))
+        self.assertEqual(first, utc(2026, 11, 1, 8, 50))
+        self.assertEqual(rule.next_after(first, first), utc(2026, 11, 2, 9, 50))
+
+    def test_skipped_hour(self):
+        # Clocks go forward at 10:00 UTC on 2026-03-08; 02:30 local never happens
+        rule = CronRule("30 2,3 * * *", LOS_ANGELES)
+        now = utc(2026, 3, 8, 9, 0)
+        fire_at = rule.next_after(now, now)
+        self.assertEqual(fire_at, utc(2026, 3, 8, 10, 30))
+        self.assertEqual(rule.next_after(fire_at, fire_at), utc(2026, 3, 9, 9, 30))
+
+    def test_results_strictly_increase_through_dst_changes(self):
+        rule = CronRule("*/20 0-3 * * *", LOS_ANGELES)
+        for start in (utc(2026, 3, 7, 0, 0), utc(2026, 10, 31, 0, 0)):
+            fire_at = start
+            for _ in range(100):
+                following = rule.next_after(fire_at, fire_at)
+                self.assertGreater(following, fire_at)
+                fire_at = following
+
+
+class IntervalRuleTest(unittest.TestCase):
+    def test_skips_missed_occurrences(self):
+        rule = IntervalRule(timedelta(days=1))
+        previous = utc(2026, 1, 1, 12, 0)
+        now = utc(2026, 1, 4, 13, 0)
+        self.assertEqual(rule.next_after(previous, now), utc(2026, 1, 5, 12, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
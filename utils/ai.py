@@ -1,4 +1,3 @@
-import io
 import json
 import logging
 import time
@@ -7,6 +6,7 @@ from google import genai
 from google.genai import types
 
 from config import CHAR_LIMIT, GEMINI_API_KEY, SYSTEM_PROMPT, VIDEO_SUMMARY_PROMPT
+from utils.images import IMAGE_MIME_TYPE
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +17,13 @@ grounding_config = types.GenerateContentConfig(tools=[grounding_tool])
 client = genai.Client(api_key=GEMINI_API_KEY)
 MODEL = "gemini-2.5-flash"
 MAX_API_RETRIES = 3
+NO_RESPONSE_TEXT = "No response generated."
+VIDEO_ANALYSIS_REQUEST = (
+    "Analyze this video thoroughly so questions about it can be answered later "
+    "without watching it again. Cover the title and creator if shown, the topic, "
+    "the key points in order with approximate timestamps, notable quotes, "
+    "on-screen text or data, and the conclusion."
+)
 
 
 def extract_response_text(response) -> str:
@@ -37,7 +44,7 @@ def extract_response_text(response) -> str:
         if text_parts:
             return "".join(text_parts)
 
-    return "No response generated."
+    return NO_RESPONSE_TEXT
 
 
 def _is_retryable_error(error: Exception) -> bool:
@@ -109,21 +116,34 @@ def summarize_channel(messages):
     return text
 
 
-def convert_pil_to_part(pil_image):
-    """Convert PIL Image to a Google GenAI Part object."""
-    if pil_image.mode in ("RGBA", "P"):
-        pil_image = pil_image.convert("RGB")
+def convert_image_to_part(image):
+    """Wrap a PreparedImage (see utils.images) in a Google GenAI Part."""
+    return {"inline_data": {"mime_type": IMAGE_MIME_TYPE, "data": image.data}}
 
-    img_byte_arr = io.BytesIO()
-    pil_image.save(img_byte_arr, format="JPEG")
-    img_byte_arr.seek(0)
 
-    return {"inline_data": {"mime_type": "image/jpeg", "data": img_byte_arr.getvalue()}}
+def convert_video_to_part(url, analysis=None):
+    """Create a part for YouTube video content, or its cached analysis as text"""
+    if analysis:
+        return {"text": f"Analysis of the video {url}:\n{analysis}"}
+    return {"file_data": {"mime_type": "video/*", "fileUri": url}}
 
 
-def convert_video_to_part(url):
-    """Create a part for YouTube video content"""
-    return {"file_data": {"mime_type": "video/*", "fileUri": url}}
+def analyze_video(url):
+    """Produce a reusable text analysis of a YouTube video."""
+    config = types.GenerateContentConfig(system_instruction=VIDEO_SUMMARY_PROMPT)
+    return generate_content_with_retry(
+        model=MODEL,
+        contents=[
+            {
+                "role": "user",
+                "parts": [
+                    convert_video_to_part(url),
+                    {"text": VIDEO_ANALYSIS_REQUEST},
+                ],
+            }
+        ],
+        config=config,
+    )
 
 
 def chat_with_ai(
@@ -132,6 +152,7 @@ def chat_with_ai(
     notes_context="",
     images=None,
     videos=None,
+    video_analyses=None,
 ):
     """Generate a response from the AI given user input, optional history, and notes."""
 
@@ -155,11 +176,12 @@ def chat_with_ai(
     current_prompt = [{"text": cleaned_content}]
     if images:
         for img in images:
-            current_prompt.append(convert_pil_to_part(img))
+            current_prompt.append(convert_image_to_part(img))
 
     if videos:
+        video_analyses = video_analyses or {}
         for url in videos:
-            current_prompt.append(convert_video_to_part(url))
+            current_prompt.append(convert_video_to_part(url, video_analyses.get(url)))
 
     conversation.append({"role": "user", "parts": current_prompt})
 
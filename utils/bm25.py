@@ -0,0 +1,120 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; keeps numbers and IDs like 'a1' intact."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """In-process inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self._doc_lengths: dict[str, int] = {}
+        self._doc_terms: dict[str, tuple[str, ...]] = {}
+        self._sources: dict[str, set[str]] = defaultdict(set)
+        self._doc_sources: dict[str, str] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def add(self, doc_id: str, text: str, source: str = ""):
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in counts.items():
+                self._postings[term][doc_id] = tf
+            length = sum(counts.values())
+            self._doc_lengths[doc_id] = length
+            self._doc_terms[doc_id] = tuple(counts)
+            self._total_length += length
+            self._sources[source].add(doc_id)
+            self._doc_sources[doc_id] = source
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def remove_source(self, source: str):
+        with self._lock:
+            for doc_id in list(self._sources.get(source, ())):
+                self._remove_locked(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_lengths.clear()
+            self._doc_terms.clear()
+            self._sources.clear()
+            self._doc_sources.clear()
+            self._total_length = 0
+
+    def _remove_locked(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        source = self._doc_sources.pop(doc_id)
+        docs = self._sources.get(source)
+        if docs is not None:
+            docs.discard(doc_id)
+            if not docs:
+                del self._sources[source]
+
+    def search(
+        self, query: str, k: int = 10, source_filter=None
+    ) -> list[tuple[str, float]]:
+        """Return up to k (doc_id, score) pairs, best first.
+
+        source_filter, if given, is called with each document's source and
+        must return True for the document to be scored.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count or not terms:
+                return []
+            avg_length = self._total_length / doc_count
+            scores: dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    if source_filter is not None and not source_filter(
+                        self._doc_sources[doc_id]
+                    ):
+                        continue
+                    norm = self.k1 * (
+                        1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length
+                    )
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60) -> list[tuple[str, float]]:
+    """Fuse several ranked lists of ids into one, best first."""
+    fused: dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -1,5 +1,21 @@
 import chromadb
+from chromadb.utils import embedding_functions
 
-chroma_client = chromadb.PersistentClient(path="./chroma_db")
+CHROMA_PATH = "./chroma_db"
 
-collection = chroma_client.get_or_create_collection("personal_notes")
+embedding_function = embedding_functions.DefaultEmbeddingFunction()
+
+_chroma_client = None
+
+
+def get_chroma_client():
+    global _chroma_client
+    if _chroma_client is None:
+        _chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return _chroma_client
+
+
+def get_collection(name="personal_notes"):
+    return get_chroma_client().get_or_create_collection(
+        name, embedding_function=embedding_function
+    )
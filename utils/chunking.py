@@ -0,0 +1,116 @@
+import re
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?。！？])\s+")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: words and punctuation marks."""
+    return len(_TOKEN_RE.findall(text))
+
+
+class SentenceChunker:
+    """Pack paragraphs and sentences into chunks of about target_tokens.
+
+    Paragraphs are kept whole when they fit, otherwise split on sentence
+    boundaries; only sentences longer than the target are split on words.
+    The last overlap_tokens worth of sentences are repeated in the next chunk.
+    """
+
+    def __init__(self, target_tokens: int = 200, overlap_tokens: int = 0):
+        self.target_tokens = target_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @property
+    def name(self) -> str:
+        return f"sentences-{self.target_tokens}-{self.overlap_tokens}"
+
+    def _units(self, text: str):
+        """Yield (unit, tokens, starts_paragraph) pieces no larger than the target."""
+        for paragraph in _PARAGRAPH_RE.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            tokens = estimate_tokens(paragraph)
+            if tokens <= self.target_tokens:
+                yield paragraph, tokens, True
+                continue
+
+            first = True
+            for sentence in _SENTENCE_RE.split(paragraph):
+                tokens = estimate_tokens(sentence)
+                if tokens <= self.target_tokens:
+                    yield sentence, tokens, first
+                    first = False
+                    continue
+                words = sentence.split()
+                piece = []
+                piece_tokens = 0
+                for word in words:
+                    word_tokens = estimate_tokens(word)
+                    if piece and piece_tokens + word_tokens > self.target_tokens:
+                        yield " ".join(piece), piece_tokens, first
+                        first = False
+                        piece, piece_tokens = [], 0
+                    piece.append(word)
+                    piece_tokens += word_tokens
+                if piece:
+                    yield " ".join(piece), piece_tokens, first
+                    first = False
+
+    @staticmethod
+    def _join(units) -> str:
+        text = ""
+        for unit, _, starts_paragraph in units:
+            if text:
+                text += "\n\n" if starts_paragraph else " "
+            text += unit
+        return text
+
+    def chunks(self, text: str):
+        current = []
+        current_tokens = 0
+        fresh = 0
+
+        for unit in self._units(text):
+            if fresh and current_tokens + unit[1] > self.target_tokens:
+                yield self._join(current)
+                overlap = []
+                overlap_tokens = 0
+                for previous in reversed(current):
+                    if overlap_tokens + previous[1] > self.overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_tokens += previous[1]
+                while overlap and overlap_tokens + unit[1] > self.target_tokens:
+                    overlap_tokens -= overlap.pop(0)[1]
+                current, current_tokens, fresh = overlap, overlap_tokens, 0
+
+            current.append(unit)
+            current_tokens += unit[1]
+            fresh += 1
+
+        if fresh:
+            yield self._join(current)
+
+
+class LineGroupChunker:
+    """Join consecutive entry lines (CSV rows, JSON members) into groups."""
+
+    def __init__(self, size: int = 8):
+        self.size = size
+
+    @property
+    def name(self) -> str:
+        return f"lines-{self.size}"
+
+    def chunks(self, lines):
+        group = []
+        for line in lines:
+            group.append(line)
+            if len(group) >= self.size:
+                yield "\n".join(group)
+                group = []
+        if group:
+            yield "\n".join(group)
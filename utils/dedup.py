@@ -0,0 +1,120 @@
+import hashlib
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from utils.bm25 import tokenize
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def _shingles(text: str, size: int) -> set[str]:
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHashDeduplicator:
+    """MinHash signatures with LSH banding to find near-duplicate chunks."""
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.9,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._signatures: dict[str, np.ndarray] = {}
+        self._buckets: dict[tuple[int, bytes], set[str]] = defaultdict(set)
+        self._sources: dict[str, set[str]] = defaultdict(set)
+        self._doc_sources: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        shingles = _shingles(text, self.shingle_size)
+        if not shingles:
+            return None
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little")
+                for s in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start : start + self.rows].tobytes()
+
+    def find_duplicate(self, signature: np.ndarray) -> str | None:
+        """Return the id of an indexed chunk that is a near-duplicate, if any."""
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates |= self._buckets.get(key, set())
+            for doc_id in candidates:
+                similarity = float(np.mean(self._signatures[doc_id] == signature))
+                if similarity >= self.threshold:
+                    return doc_id
+        return None
+
+    def source_of(self, doc_id: str) -> str | None:
+        with self._lock:
+            return self._doc_sources.get(doc_id)
+
+    def add(self, doc_id: str, signature: np.ndarray, source: str = ""):
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._signatures[doc_id] = signature
+            for key in self._band_keys(signature):
+                self._buckets[key].add(doc_id)
+            self._sources[source].add(doc_id)
+            self._doc_sources[doc_id] = source
+
+    def remove_source(self, source: str):
+        with self._lock:
+            for doc_id in list(self._sources.get(source, ())):
+                self._remove_locked(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._signatures.clear()
+            self._buckets.clear()
+            self._sources.clear()
+            self._doc_sources.clear()
+
+    def _remove_locked(self, doc_id: str):
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[key]
+        source = self._doc_sources.pop(doc_id)
+        docs = self._sources.get(source)
+        if docs is not None:
+            docs.discard(doc_id)
+            if not docs:
+                del self._sources[source]
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Workers per workload class; each class gets its own pool so a backlog of
+# slow Gemini calls cannot starve notes search or ingestion.
+EXECUTOR_WORKERS = {
+    "ai": int(os.getenv("AI_WORKERS", "8")),
+    "vector_search": int(os.getenv("VECTOR_SEARCH_WORKERS", "2")),
+    "images": int(os.getenv("IMAGE_WORKERS", "2")),
+    "ingestion": int(os.getenv("INGESTION_WORKERS", "1")),
+}
+# Image decode/resize/encode is CPU-bound and holds the GIL, so it gets processes
+PROCESS_EXECUTORS = {"images"}
+# Imported once by the forkserver so each forked worker starts with them loaded
+FORKSERVER_PRELOAD = ["utils.images"]
+SATURATION_WARN_SECONDS = 1.0
+SATURATION_WARN_INTERVAL = 60.0
+
+
+def _timed_call(submitted: float, func, args, kwargs):
+    """Run func in a worker and report how long it sat in the queue.
+
+    Module-level so it can be pickled into process pool workers;
+    time.monotonic() is system-wide, so the wait is valid across processes.
+    """
+    waited = time.monotonic() - submitted
+    return waited, func(*args, **kwargs)
+
+
+class BoundedExecutor:
+    """A fixed-size thread or process pool that tracks queueing and saturation."""
+
+    def __init__(self, name: str, max_workers: int, processes: bool = False):
+        self.name = name
+        self.max_workers = max_workers
+        self.processes = processes
+        if processes:
+            # fork() is unsafe once the bot's threads are running
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            context = mp.get_context(method)
+            if method == "forkserver":
+                context.set_forkserver_preload(FORKSERVER_PRELOAD)
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"{name}-worker"
+            )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._last_warning = 0.0
+
+    def _submit(self, func, *args, **kwargs):
+        with self._lock:
+            self._in_flight += 1
+            queued = max(0, self._in_flight - self.max_workers)
+            self._peak_queued = max(self._peak_queued, queued)
+        try:
+            future = self._pool.submit(
+                _timed_call, time.monotonic(), func, args, kwargs
+            )
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        waited = None
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self._failed += 1
+            else:
+                waited = future.result()[0]
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            self._completed += 1
+
+            now = time.monotonic()
+            warn = (
+                waited is not None
+                and waited >= SATURATION_WARN_SECONDS
+                and now - self._last_warning >= SATURATION_WARN_INTERVAL
+            )
+            if warn:
+                self._last_warning = now
+        if warn:
+            logger.warning(
+                f"Executor '{self.name}' saturated: task waited {waited:.2f}s "
+                f"for one of {self.max_workers} workers"
+            )
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking call on this executor from the event loop.
+
+        For process pools func and its arguments must be picklable.
+        """
+        _, result = await asyncio.wrap_future(self._submit(func, *args, **kwargs))
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self._completed
+            running = min(self._in_flight, self.max_workers)
+            return {
+                "workers": self.max_workers,
+                "processes": self.processes,
+                "running": running,
+                "queued": self._in_flight - running,
+                "peak_queued": self._peak_queued,
+                "completed": completed,
+                "failed": self._failed,
+                "utilization": running / self.max_workers,
+                "avg_wait_ms": self._wait_total / completed * 1000 if completed else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_executors: dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Return the named executor, creating it on first use."""
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            if name not in EXECUTOR_WORKERS:
+                raise KeyError(f"Unknown executor: {name}")
+            executor = BoundedExecutor(
+                name, EXECUTOR_WORKERS[name], processes=name in PROCESS_EXECUTORS
+            )
+            _executors[name] = executor
+        return executor
+
+
+async def run_in_executor(name: str, func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the named executor."""
+    return await get_executor(name).run(func, *args, **kwargs)
+
+
+def executor_stats() -> dict[str, dict]:
+    """Saturation metrics for every executor that has been used."""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
+
+
+def shutdown_executors(wait: bool = False):
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
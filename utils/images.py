@@ -0,0 +1,109 @@
+import hashlib
+import io
+import logging
+import os
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+MAX_IMAGE_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1536"))
+JPEG_QUALITY = 85
+IMAGE_MIME_TYPE = "image/jpeg"
+# dHash grid size; 16x16 gives 256 bits, enough to tell apart screenshots
+# that share a layout but not their content
+HASH_SIZE = 16
+# Max differing dHash bits for two images to count as the same picture
+DUPLICATE_HASH_DISTANCE = 4
+# Max relative difference in aspect ratio for two images to count as the same
+DUPLICATE_ASPECT_TOLERANCE = 0.01
+
+
+class PreparedImage:
+    """JPEG bytes ready to send, plus hashes for deduplication.
+
+    digest is the SHA-256 of data and identifies exactly this content;
+    phash is a perceptual hash that also matches rescaled or recompressed
+    copies of the same picture.
+    """
+
+    __slots__ = ("data", "digest", "phash", "width", "height")
+
+    def __init__(self, data: bytes, phash: int, width: int, height: int):
+        self.data = data
+        self.digest = hashlib.sha256(data).digest()
+        self.phash = phash
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return (
+            f"PreparedImage({self.width}x{self.height}, {len(self.data)} bytes, "
+            f"digest={self.digest.hex()[:12]})"
+        )
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """Difference hash: compares neighbouring pixels of a tiny grayscale copy.
+
+    Robust to rescaling and recompression, so reposts of the same picture at
+    different sizes or qualities hash within a few bits of each other.
+    """
+    small = image.convert("L").resize(
+        (hash_size + 1, hash_size), Image.Resampling.LANCZOS
+    )
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def is_duplicate(a: PreparedImage, b: PreparedImage) -> bool:
+    """Same content, or the same picture at another size or quality."""
+    if a.digest == b.digest:
+        return True
+    aspect_a = a.width / a.height
+    aspect_b = b.width / b.height
+    if abs(aspect_a - aspect_b) > DUPLICATE_ASPECT_TOLERANCE * max(aspect_a, aspect_b):
+        return False
+    return (a.phash ^ b.phash).bit_count() <= DUPLICATE_HASH_DISTANCE
+
+
+def dedupe_images(images) -> list[PreparedImage]:
+    """Drop images that look the same as an earlier one in the list."""
+    unique = []
+    for image in images:
+        if not any(is_duplicate(image, seen) for seen in unique):
+            unique.append(image)
+    return unique
+
+
+def prepare_image(
+    data: bytes, max_dimension: int = MAX_IMAGE_DIMENSION
+) -> PreparedImage:
+    """Decode, downscale and re-encode an image as JPEG bytes ready to send.
+
+    Runs in the images process pool. JPEGs are decoded in draft mode, which
+    lets libjpeg scale by 1/2, 1/4 or 1/8 while decoding instead of
+    materializing the full-size bitmap first.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        if image.format == "JPEG":
+            image.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension))
+
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        return PreparedImage(output.getvalue(), dhash(image), *image.size)
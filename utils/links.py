@@ -1,12 +1,18 @@
-import io
 import logging
 import re
 
 import aiohttp
-from PIL import Image
+from yarl import URL
+
+from utils.executors import run_in_executor
+from utils.images import MAX_IMAGE_DIMENSION, dedupe_images, prepare_image
 
 logger = logging.getLogger(__name__)
 
+MAX_IMAGE_BYTES = 25 * 1024 * 1024
+MAX_IMAGE_PIXELS = 50_000_000
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
 
 class CustomClientRequest(aiohttp.ClientRequest):
     def __init__(self, *args, **kwargs):
@@ -23,7 +29,7 @@ def extract_links(text: str):
 
 
 async def download_image_from_url(url: str):
-    """Download an image from a URL if it is an actual image."""
+    """Download an image from a URL and return it as a PreparedImage."""
     try:
         async with aiohttp.ClientSession(request_class=CustomClientRequest) as session:
             async with session.get(url) as resp:
@@ -38,20 +44,70 @@ async def download_image_from_url(url: str):
                     )
                     return None
 
-                data = await resp.read()
-                image = Image.open(io.BytesIO(data))
-                return image
+                if (resp.content_length or 0) > MAX_IMAGE_BYTES:
+                    logger.info(
+                        f"Image too large: {url} ({resp.content_length} bytes)"
+                    )
+                    return None
+
+                # Content-Length may be absent or wrong, so cap the body as it streams
+                data = bytearray()
+                async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                    data += chunk
+                    if len(data) > MAX_IMAGE_BYTES:
+                        logger.info(f"Image too large: {url}")
+                        return None
+                return await run_in_executor("images", prepare_image, bytes(data))
 
     except Exception as e:
         logger.exception(f"Error downloading image from {url}: {e}")
         return None
 
 
+def _is_usable_image(attachment) -> bool:
+    """Check attachment metadata so non-images and huge files are never fetched."""
+    content_type = attachment.content_type or ""
+    if not content_type.startswith("image/"):
+        return False
+    if attachment.size > MAX_IMAGE_BYTES:
+        logger.info(
+            f"Skipping oversize attachment {attachment.filename} ({attachment.size} bytes)"
+        )
+        return False
+    if not attachment.width or not attachment.height:
+        return False
+    if attachment.width * attachment.height > MAX_IMAGE_PIXELS:
+        logger.info(
+            f"Skipping oversize attachment {attachment.filename} "
+            f"({attachment.width}x{attachment.height})"
+        )
+        return False
+    return True
+
+
+def resized_attachment_url(attachment, max_dimension: int = MAX_IMAGE_DIMENSION) -> str:
+    """Media proxy URL that has Discord downscale the image to max_dimension."""
+    scale = max_dimension / max(attachment.width, attachment.height)
+    if scale >= 1:
+        return attachment.proxy_url
+    return str(
+        URL(attachment.proxy_url).update_query(
+            width=max(1, round(attachment.width * scale)),
+            height=max(1, round(attachment.height * scale)),
+        )
+    )
+
+
 async def collect_images_from_attachments(attachments):
     """Helper function to collect images from attachments"""
     images = []
     for attachment in attachments:
-        image = await download_image_from_url(attachment.url)
+        if not _is_usable_image(attachment):
+            continue
+        image = await download_image_from_url(resized_attachment_url(attachment))
+        if image is None:
+            # The proxy can refuse some files; fall back to the original
+            image = await download_image_from_url(attachment.url)
         if image:
             images.append(image)
     return images
@@ -77,7 +133,12 @@ async def collect_images_from_message(content, attachments=None):
 
     images.extend(await collect_images_from_links(content))
 
-    return images
+    return dedupe_images(images)
+
+
+def youtube_video_id(url: str):
+    """Video ID of a canonical watch URL from extract_youtube_urls."""
+    return url.split("watch?v=")[-1]
 
 
 def extract_youtube_urls(text: str):
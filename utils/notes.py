@@ -1,14 +1,137 @@
 import hashlib
 import json
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 
 import pandas as pd
 
-from utils.chroma_client import collection
+from utils.bm25 import BM25Index, reciprocal_rank_fusion
+from utils.chroma_client import embedding_function
+from utils.chunking import LineGroupChunker, SentenceChunker
+from utils.dedup import MinHashDeduplicator
+from utils.executors import run_in_executor
+from utils.vector_store import list_vector_stores, open_vector_store
 
 logger = logging.getLogger(__name__)
 
+NOTES_FOLDER = Path("./notes")
+NOTE_SUFFIXES = (".txt", ".csv", ".json")
+CSV_BLOCK_ROWS = 5000
+UPSERT_BATCH_SIZE = 64
+JSON_READ_SIZE = 1 << 16
+QUERY_EMBEDDING_CACHE_SIZE = 512
+RESULT_CACHE_SIZE = 256
+SEARCH_CANDIDATES = 10
+# Squared L2 between normalized embeddings (2 - 2 * cosine); 1.2 ~ cosine 0.4
+MAX_VECTOR_DISTANCE = 1.2
+REBUILD_PAGE_SIZE = 1000
+SHARED_NAMESPACE = "shared"
+STORE_PREFIX = "personal_notes"
+
+CHUNKING = {
+    "txt": SentenceChunker(target_tokens=200, overlap_tokens=30),
+    "csv": LineGroupChunker(size=8),
+    "json": LineGroupChunker(size=8),
+}
+
+_index_lock = threading.RLock()
+_index_generation = 0
+_notes_ready = threading.Event()
+_load_progress = {"files_done": 0, "files_total": 0}
+_namespaces = {}
+_dedup_stats = {"chunks_seen": 0, "chunks_skipped": 0}
+
+
+class NotesNamespace:
+    """One tenant's notes: its own vector store, keyword index and dedup index.
+
+    Files directly in ./notes (or in non-numeric subfolders) belong to the
+    shared namespace; files under ./notes/<guild id>/ belong to that guild.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.store = open_vector_store(self.store_name(name))
+        self.keyword_index = BM25Index()
+        self.deduplicator = MinHashDeduplicator()
+        # source -> files that skipped chunks as near-duplicates of its chunks
+        self.dedup_dependents: defaultdict[str, set[str]] = defaultdict(set)
+
+    def forget_dependencies(self, source: str):
+        """Drop the record of which sources this source's skipped chunks duplicated."""
+        for dependents in self.dedup_dependents.values():
+            dependents.discard(source)
+
+    @staticmethod
+    def store_name(name: str) -> str:
+        if name == SHARED_NAMESPACE:
+            return STORE_PREFIX
+        return f"{STORE_PREFIX}_{name}"
+
+
+def get_namespace(name: str) -> NotesNamespace:
+    with _index_lock:
+        namespace = _namespaces.get(name)
+        if namespace is None:
+            namespace = _namespaces[name] = NotesNamespace(name)
+        return namespace
+
+
+def namespace_of(relative_path) -> str:
+    """Namespace a notes-relative path belongs to."""
+    parts = Path(relative_path).parts
+    if len(parts) > 1 and parts[0].isdigit():
+        return parts[0]
+    return SHARED_NAMESPACE
+
+
+def _known_namespaces() -> set[str]:
+    """Namespaces with a store on disk or a folder under ./notes."""
+    names = {SHARED_NAMESPACE}
+    for store_name in list_vector_stores():
+        if store_name.startswith(f"{STORE_PREFIX}_"):
+            names.add(store_name[len(STORE_PREFIX) + 1 :])
+    if NOTES_FOLDER.exists():
+        names.update(
+            entry.name
+            for entry in NOTES_FOLDER.iterdir()
+            if entry.is_dir() and entry.name.isdigit()
+        )
+    return names
+
+
+def get_index_generation() -> int:
+    """Counter bumped whenever the notes index changes (for cache keys)."""
+    return _index_generation
+
+
+def notes_ready() -> bool:
+    """True once the initial notes load has finished."""
+    return _notes_ready.is_set()
+
+
+def get_load_progress() -> dict:
+    """Files indexed so far and total files found by the current load."""
+    return dict(_load_progress)
+
+
+def get_dedup_stats() -> dict:
+    """Chunks checked and skipped as near-duplicates since startup."""
+    return dict(_dedup_stats)
+
+
+def _commit_index_changes():
+    """Persist pending store writes and bump the index generation."""
+    global _index_generation
+    with _index_lock:
+        for namespace in _namespaces.values():
+            namespace.store.persist()
+        _index_generation += 1
+
 
 def file_hash(path: Path) -> str:
     """Compute md5 hash of a file (for change detection)."""
@@ -20,23 +143,109 @@ def file_hash(path: Path) -> str:
 
 
 def already_ingested(file_path: Path, file_hash_val: str) -> bool:
-    """Check if a file with this hash is already in the DB."""
-    results = collection.get(
-        where={"file_hash": {"$eq": file_hash_val}},
+    """Check if this file is already in the DB with this hash and chunking."""
+    relative_path = file_path.relative_to(NOTES_FOLDER)
+    chunker = CHUNKING[file_path.suffix.lstrip(".")]
+    results = get_namespace(namespace_of(relative_path)).store.get(
+        where={
+            "$and": [
+                {"source": {"$eq": str(relative_path)}},
+                {"file_hash": {"$eq": file_hash_val}},
+                {"chunker": {"$eq": chunker.name}},
+            ]
+        },
         limit=1,
     )
     return len(results["ids"]) > 0
 
 
-def cleanup_deleted_files():
+def _doc_id(relative_path: Path, kind: str, index: int) -> str:
+    return f"{relative_path.with_suffix('').as_posix()}_{kind}_{index}"
+
+
+def remove_note_source(relative_path) -> int:
+    """Remove every chunk that came from the given notes-relative path."""
+    namespace = get_namespace(namespace_of(relative_path))
+    results = namespace.store.get(where={"source": {"$eq": str(relative_path)}})
+    if results["ids"]:
+        namespace.store.delete(results["ids"])
+    namespace.keyword_index.remove_source(str(relative_path))
+    namespace.deduplicator.remove_source(str(relative_path))
+    namespace.forget_dependencies(str(relative_path))
+    return len(results["ids"])
+
+
+def _invalidate_dependents(relative_path) -> list[str]:
+    """Remove the chunks of files that skipped near-duplicates of this file's chunks.
+
+    Those files rely on this one to hold the skipped text, so once it is
+    edited or deleted they must be ingested again. Applies transitively;
+    returns the invalidated paths for the caller to re-ingest.
+    """
+    namespace = get_namespace(namespace_of(relative_path))
+    pending = [str(relative_path)]
+    invalidated = []
+    while pending:
+        source = pending.pop()
+        for dependent in sorted(namespace.dedup_dependents.pop(source, ())):
+            if dependent == str(relative_path) or dependent in invalidated:
+                continue
+            remove_note_source(dependent)
+            invalidated.append(dependent)
+            pending.append(dependent)
+    return invalidated
+
+
+def _reingest(relative_paths):
+    for relative_path in relative_paths:
+        note_file = NOTES_FOLDER / relative_path
+        if note_file.is_file():
+            logger.info(f"Re-ingesting {relative_path} (near-duplicate source changed)")
+            ingest_note_file(note_file)
+
+
+def _index_documents(namespace: NotesNamespace, ids, documents, metadatas):
+    """Write chunks to the namespace's vector store and keyword index."""
+    namespace.store.upsert(ids, documents, metadatas, embedding_function(documents))
+    for doc_id, document, metadata in zip(ids, documents, metadatas):
+        namespace.keyword_index.add(doc_id, document, metadata["source"])
+
+
+def _rebuild_memory_indexes(namespace: NotesNamespace):
+    """Rebuild the keyword and dedup indexes from chunks already in the vector store."""
+    namespace.keyword_index.clear()
+    namespace.deduplicator.clear()
+    offset = 0
+    while True:
+        page = namespace.store.get(limit=REBUILD_PAGE_SIZE, offset=offset)
+        for doc_id, document, metadata in zip(
+            page["ids"], page["documents"], page["metadatas"]
+        ):
+            source = metadata.get("source", "")
+            namespace.keyword_index.add(doc_id, document or "", source)
+            for duplicated in json.loads(metadata.get("dedup_sources", "[]")):
+                namespace.dedup_dependents[duplicated].add(source)
+            signature = namespace.deduplicator.signature(document or "")
+            if signature is not None:
+                namespace.deduplicator.add(doc_id, signature, source)
+        if len(page["ids"]) < REBUILD_PAGE_SIZE:
+            break
+        offset += REBUILD_PAGE_SIZE
+    logger.info(
+        f"Keyword and dedup indexes ready for {namespace.name} "
+        f"({len(namespace.keyword_index)} chunks)"
+    )
+
+
+def cleanup_deleted_files(namespace: NotesNamespace):
     """Remove chunks from vector DB for files that no longer exist in the notes folder"""
-    notes_folder = Path("./notes")
+    notes_folder = NOTES_FOLDER
     if not notes_folder.exists():
         logger.info("Notes folder doesn't exist, skipping cleanup")
         return
     
     try:
-        results = collection.get()
+        results = namespace.store.get()
         
         if not results["metadatas"]:
             logger.info("No documents in vector DB to clean up")
@@ -44,7 +253,7 @@ def cleanup_deleted_files():
         
         current_files = set()
         for file_path in notes_folder.rglob("*"):
-            if file_path.is_file() and file_path.suffix in ['.txt', '.csv', '.json']:
+            if file_path.is_file() and file_path.suffix in NOTE_SUFFIXES:
                 relative_path = file_path.relative_to(notes_folder)
                 current_files.add(str(relative_path))
         
@@ -58,7 +267,15 @@ def cleanup_deleted_files():
                 deleted_sources.add(source)
         
         if chunks_to_remove:
-            collection.delete(ids=chunks_to_remove)
+            namespace.store.delete(chunks_to_remove)
+            for source in deleted_sources:
+                namespace.keyword_index.remove_source(source)
+                namespace.deduplicator.remove_source(source)
+                namespace.forget_dependencies(source)
+            # Files that leaned on a deleted file's chunks lose their rows
+            # here and are ingested again by the load that follows
+            for source in sorted(deleted_sources):
+                _invalidate_dependents(source)
             logger.info(f"Cleanup: Removed {len(chunks_to_remove)} chunks from {len(deleted_sources)} deleted files:")
             for source in sorted(deleted_sources):
                 logger.info(f"   - {source}")
@@ -69,164 +286,553 @@ def cleanup_deleted_files():
         logger.exception(f"Error during cleanup: {e}")
 
 
+def _upsert_chunks(relative_path: Path, kind: str, chunks, metadata: dict) -> int:
+    """Upsert chunks in batches as they are produced, skipping near-duplicates
+    of chunks already indexed. Returns the number of chunks stored.
+
+    The files whose chunks were duplicated are recorded (in memory and, as
+    dedup_sources, on the last stored chunk) so this file can be re-ingested
+    when one of them changes.
+    """
+    namespace = get_namespace(namespace_of(relative_path))
+    deduplicator = namespace.deduplicator
+    source = str(relative_path)
+    count = 0
+    skipped = 0
+    duplicated_sources = set()
+    batch_docs, batch_ids, batch_meta = [], [], []
+
+    def flush():
+        if batch_docs:
+            _index_documents(namespace, batch_ids, batch_docs, batch_meta)
+            batch_docs.clear()
+            batch_ids.clear()
+            batch_meta.clear()
+
+    for chunk in chunks:
+        _dedup_stats["chunks_seen"] += 1
+        signature = deduplicator.signature(chunk)
+        if signature is not None:
+            duplicate = deduplicator.find_duplicate(signature)
+            if duplicate is not None:
+                skipped += 1
+                _dedup_stats["chunks_skipped"] += 1
+                duplicated_source = deduplicator.source_of(duplicate)
+                if duplicated_source not in (None, source):
+                    duplicated_sources.add(duplicated_source)
+                continue
+            deduplicator.add(_doc_id(relative_path, kind, count), signature, source)
+
+        # Flush before appending so the last batch is still pending below
+        if len(batch_docs) >= UPSERT_BATCH_SIZE:
+            flush()
+        batch_docs.append(chunk)
+        batch_ids.append(_doc_id(relative_path, kind, count))
+        batch_meta.append({
+            "source": source,
+            "namespace": namespace.name,
+            "chunk": count,
+            "type": kind,
+            **metadata,
+        })
+        count += 1
+
+    if duplicated_sources:
+        for duplicated_source in duplicated_sources:
+            namespace.dedup_dependents[duplicated_source].add(source)
+        if batch_meta:
+            batch_meta[-1]["dedup_sources"] = json.dumps(sorted(duplicated_sources))
+    flush()
+
+    if skipped:
+        logger.info(f"Skipped {skipped} near-duplicate chunks in {relative_path}")
+    return count
+
+
+def _load_txt(note_file: Path, relative_path: Path, metadata: dict):
+    with open(note_file, "r", encoding="utf-8") as file:
+        content = file.read()
+
+    chunks = CHUNKING["txt"].chunks(content)
+    count = _upsert_chunks(relative_path, "txt", chunks, metadata)
+
+    logger.info(f"Loaded {relative_path} ({count} chunks)")
+
+
+def _format_csv_block(block: pd.DataFrame, first_entry: int) -> list[str]:
+    """Build "Entry N - col: val, ..." lines for a block of rows, column by column."""
+    rows = pd.Series("", index=block.index, dtype=object)
+    for col in block.columns:
+        values = block[col]
+        mask = values.notna() & (values.str.strip() != "")
+        rows = rows + (f", {col}: " + values).where(mask, "")
+
+    numbers = pd.Series(range(first_entry, first_entry + len(block)), index=block.index)
+    mask = rows != ""
+    lines = "Entry " + numbers[mask].astype(str) + " - " + rows[mask].str[2:]
+    return lines.tolist()
+
+
+def _csv_shape(csv_file: Path) -> tuple[list[str], int]:
+    """Column names and row count, streaming a single column to count rows."""
+    columns = [str(col) for col in pd.read_csv(csv_file, nrows=0).columns]
+    total_rows = 0
+    if columns:
+        reader = pd.read_csv(csv_file, usecols=[0], dtype=str, chunksize=CSV_BLOCK_ROWS)
+        with reader:
+            for block in reader:
+                total_rows += len(block)
+    return columns, total_rows
+
+
+def _load_csv(csv_file: Path, relative_path: Path, metadata: dict):
+    # Counting rows up front costs a cheap one-column pass, but lets every
+    # chunk carry total_rows and the summary lead the first chunk as before.
+    columns, total_rows = _csv_shape(csv_file)
+
+    def entries():
+        yield f"CSV Summary - File: {csv_file.name}, Columns: {', '.join(columns)}, Total rows: {total_rows}"
+        first_entry = 1
+        reader = pd.read_csv(
+            csv_file, dtype=str, chunksize=CSV_BLOCK_ROWS
+        )
+        with reader:
+            for block in reader:
+                yield from _format_csv_block(block, first_entry)
+                first_entry += len(block)
+
+    count = _upsert_chunks(
+        relative_path,
+        "csv",
+        CHUNKING["csv"].chunks(entries()),
+        {**metadata, "total_rows": total_rows},
+    )
+
+    logger.info(
+        f"Loaded CSV {relative_path} ({total_rows} rows → {count} chunks)"
+    )
+
+
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class _JsonStream:
+    """Minimal incremental reader for the top level of a JSON document."""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        # Read at least as much as is already buffered so retries on a large
+        # value stay linear overall.
+        data = self.f.read(max(JSON_READ_SIZE, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number or literal at the end of the buffer may continue in the
+            # next read, so only trust it once more data (or EOF) follows.
+            # A number cut mid-way ("12e|5", "1.|25") decodes as its valid
+            # prefix and stops at a character that could still extend it.
+            if end == len(self.buf) or (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and self.buf[end] in _NUMBER_CHARS
+            ):
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_json_members(f):
+    """Yield (key, value) for each top-level member of a JSON document.
+
+    Keys are strings for objects and 0-based indexes for arrays; any other
+    top-level value is yielded once with a key of None.
+    """
+    stream = _JsonStream(f)
+    opening = stream.peek()
+
+    if opening not in ("[", "{"):
+        if opening:
+            yield None, stream.value()
+        return
+
+    closing = "]" if opening == "[" else "}"
+    stream.expect(opening)
+    if stream.peek() == closing:
+        stream.expect(closing)
+        return
+
+    index = 0
+    while True:
+        if opening == "{":
+            key = stream.value()
+            stream.expect(":")
+        else:
+            key = index
+        yield key, stream.value()
+        index += 1
+        if stream.expect("," + closing) == closing:
+            return
+
+
+def _json_entries(members):
+    for key, value in members:
+        if key is None:
+            yield str(value)
+        elif isinstance(key, str):
+            yield f"{key}: {value}"
+        elif isinstance(value, dict):
+            row_items = [f"{k}: {v}" for k, v in value.items()]
+            yield f"Entry {key+1} - " + ", ".join(row_items)
+        else:
+            yield f"Entry {key+1}: {value}"
+
+
+def _load_json(json_file: Path, relative_path: Path, metadata: dict):
+    entry_count = 0
+
+    def entries():
+        nonlocal entry_count
+        with open(json_file, "r", encoding="utf-8") as f:
+            for entry in _json_entries(iter_json_members(f)):
+                entry_count += 1
+                yield entry
+
+    count = _upsert_chunks(
+        relative_path, "json", CHUNKING["json"].chunks(entries()), metadata
+    )
+
+    logger.info(f"Loaded JSON {relative_path} ({entry_count} entries → {count} chunks)")
+
+
+_LOADERS = {
+    ".txt": _load_txt,
+    ".csv": _load_csv,
+    ".json": _load_json,
+}
+
+
+def ingest_note_file(note_file: Path) -> bool:
+    """Index a single notes file, replacing its old chunks. Returns True if it changed."""
+    loader = _LOADERS.get(note_file.suffix)
+    if loader is None:
+        return False
+
+    fhash = file_hash(note_file)
+    if already_ingested(note_file, fhash):
+        logger.info(f"Skipping {note_file} (no changes)")
+        return False
+
+    relative_path = note_file.relative_to(NOTES_FOLDER)
+    metadata = {
+        "file_hash": fhash,
+        "chunker": CHUNKING[note_file.suffix.lstrip(".")].name,
+    }
+    with _index_lock:
+        dependents = _invalidate_dependents(relative_path)
+        remove_note_source(relative_path)
+        loader(note_file, relative_path, metadata)
+        _reingest(dependents)
+    return True
+
+
+def note_relative_path(path) -> Path:
+    """Normalize a notes-relative path, rejecting any that resolve outside NOTES_FOLDER."""
+    root = NOTES_FOLDER.resolve()
+    # Normalized lexically rather than with resolve(), so symlinked notes
+    # the startup load indexes are not refused here
+    resolved = Path(os.path.normpath(root / path))
+    if not resolved.is_relative_to(root) or resolved == root:
+        raise ValueError(f"Path is outside the notes folder: {path}")
+    return resolved.relative_to(root)
+
+
+def reindex_note_files(relative_paths) -> int:
+    """Reindex only the given notes-relative paths (added, modified or deleted)."""
+    changed = 0
+    for relative_path in sorted(set(relative_paths)):
+        try:
+            relative_path = note_relative_path(relative_path)
+        except ValueError as e:
+            logger.warning(f"Not reindexing {relative_path}: {e}")
+            continue
+        note_file = NOTES_FOLDER / relative_path
+        try:
+            if note_file.is_file():
+                if ingest_note_file(note_file):
+                    changed += 1
+            else:
+                with _index_lock:
+                    dependents = _invalidate_dependents(relative_path)
+                    removed = remove_note_source(relative_path)
+                    _reingest(dependents)
+                if removed:
+                    logger.info(f"Removed {removed} chunks for deleted {relative_path}")
+                    changed += 1
+        except Exception as e:
+            logger.exception(f"Error reindexing {relative_path}: {e}")
+
+    if changed:
+        _commit_index_changes()
+    return changed
+
+
 def load_personal_notes():
-    """Load all .txt files from a 'notes' folder into the vector database"""
-    notes_folder = Path("./notes")
+    """Load all .txt, .csv and .json files from a 'notes' folder into the vector database"""
+    notes_folder = NOTES_FOLDER
     if not notes_folder.exists():
         logger.info("No notes folder found - create ./notes/ and add .txt files")
+        _notes_ready.set()
         return
-    
-    logger.info("Checking for deleted files...")
-    cleanup_deleted_files()
 
-    logger.info("Looking for .txt files...")
-    for note_file in notes_folder.rglob("*.txt"):
-        logger.info("Found .txt: %s", note_file)
-        try:
-            fhash = file_hash(note_file)
-            if already_ingested(note_file, fhash):
-                logger.info(f"Skipping {note_file} (no changes)")
-                continue
+    try:
+        logger.info("Checking for deleted files...")
+        for name in sorted(_known_namespaces()):
+            namespace = get_namespace(name)
+            _rebuild_memory_indexes(namespace)
+            cleanup_deleted_files(namespace)
+
+        note_files = [
+            note_file
+            for suffix in NOTE_SUFFIXES
+            for note_file in sorted(notes_folder.rglob(f"*{suffix}"))
+        ]
+        stats_before = get_dedup_stats()
+        _load_progress.update(files_done=0, files_total=len(note_files))
+        logger.info(f"Found {len(note_files)} notes files")
+
+        report_every = max(1, len(note_files) // 10)
+        for done, note_file in enumerate(note_files, start=1):
+            try:
+                ingest_note_file(note_file)
+            except Exception as e:
+                logger.exception(f"Error loading {note_file}: {e}")
+            _load_progress["files_done"] = done
+            if done % report_every == 0 or done == len(note_files):
+                logger.info(f"Notes indexing progress: {done}/{len(note_files)} files")
+
+        _commit_index_changes()
+        stats = get_dedup_stats()
+        skipped = stats["chunks_skipped"] - stats_before["chunks_skipped"]
+        seen = stats["chunks_seen"] - stats_before["chunks_seen"]
+        logger.info(f"Dedup skipped {skipped}/{seen} new chunks in this load")
+    finally:
+        _notes_ready.set()
+
+
+def warmup_embedding_model():
+    """Load the embedding model with a dummy query so the first search is fast."""
+    start = time.perf_counter()
+    try:
+        embedding_function(["warmup"])
+    except Exception as e:
+        logger.exception(f"Embedding model warmup failed: {e}")
+        return
+    logger.info(f"Embedding model warmed up in {time.perf_counter() - start:.2f}s")
 
-            with open(note_file, "r", encoding="utf-8") as file:
-                content = file.read()
-
-            chunks = [content[i : i + 1000] for i in range(0, len(content), 800)]
-
-            relative_path = note_file.relative_to(notes_folder)
-            for i, chunk in enumerate(chunks):
-                doc_id = f"{note_file.stem}_{i}"
-                collection.upsert(
-                    documents=[chunk],
-                    ids=[doc_id],
-                    metadatas=[{
-                        "source": str(relative_path),
-                        "chunk": i,
-                        "file_hash": fhash,
-                        "type": "txt"
-                    }],
-                )
-
-            logger.info(f"Loaded {relative_path} ({len(chunks)} chunks)")
-        except Exception as e:
-            logger.exception(f"Error loading {note_file.name}: {e}")
 
-    logger.info("Looking for .csv files...")
-    for csv_file in notes_folder.rglob("*.csv"):
-        logger.info("Found .csv: %s", csv_file)
-        try:
-            fhash = file_hash(csv_file)
-            if already_ingested(csv_file, fhash):
-                logger.info(f"Skipping {csv_file} (no changes)")
-                continue
+class _LRUCache:
+    """Small thread-safe LRU mapping."""
 
-            df = pd.read_csv(csv_file)
-            content_chunks = []
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
 
-            summary = f"CSV Summary - File: {csv_file.name}, Columns: {', '.join(df.columns)}, Total rows: {len(df)}"
-            content_chunks.append(summary)
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
 
-            for idx, row in df.iterrows():
-                row_items = []
-                for col, val in row.items():
-                    if pd.notna(val) and str(val).strip():
-                        row_items.append(f"{col}: {val}")
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
 
-                if row_items:
-                    row_text = f"Entry {idx + 1} - " + ", ".join(row_items)
-                    content_chunks.append(row_text)
+    def clear(self):
+        with self._lock:
+            self._data.clear()
 
-            grouped_chunks = [
-                "\n".join(content_chunks[i:i+8])
-                for i in range(0, len(content_chunks), 8)
-            ]
 
-            relative_path = csv_file.relative_to(notes_folder)
-            for i, chunk in enumerate(grouped_chunks):
-                doc_id = f"{relative_path.stem}_csv_{i}"
-                collection.upsert(
-                    documents=[chunk],
-                    ids=[doc_id],
-                    metadatas=[{
-                        "source": str(relative_path),
-                        "chunk": i,
-                        "file_hash": fhash,
-                        "type": "csv",
-                        "total_rows": len(df),
-                    }],
-                )
-
-            logger.info(
-                f"Loaded CSV {relative_path} ({len(df)} rows → {len(grouped_chunks)} chunks)"
-            )
+_query_embeddings = _LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+_search_results = _LRUCache(RESULT_CACHE_SIZE)
+_MISSING = object()
 
-        except Exception as e:
-            logger.exception(f"Error loading CSV {csv_file}: {e}")
 
-    logger.info("Looking for .json files...")
-    for json_file in notes_folder.rglob("*.json"):
-        logger.info("Found .json: %s", json_file)
-        try:
-            fhash = file_hash(json_file)
-            if already_ingested(json_file, fhash):
-                logger.info(f"Skipping {json_file} (no changes)")
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def embed_query(query: str):
+    """Embed a search query, reusing cached embeddings for repeated queries."""
+    normalized = _normalize_query(query)
+    embedding = _query_embeddings.get(normalized)
+    if embedding is None:
+        embedding = embedding_function([normalized])[0]
+        _query_embeddings.put(normalized, embedding)
+    return embedding
+
+
+def _build_where(source=None, note_type=None):
+    clauses = []
+    if source is not None:
+        clauses.append({"source": {"$eq": str(source)}})
+    if note_type is not None:
+        clauses.append({"type": {"$eq": note_type}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _hybrid_search(
+    query: str, n_results: int, namespaces, source=None, note_type=None
+) -> list[str]:
+    """Fuse vector and BM25 rankings from each namespace with reciprocal rank fusion."""
+    candidates = max(n_results, SEARCH_CANDIDATES)
+    embedding = embed_query(query)
+    where = _build_where(source, note_type)
+
+    def source_filter(doc_source):
+        if source is not None and doc_source != str(source):
+            return False
+        return note_type is None or doc_source.endswith(f".{note_type}")
+
+    documents = {}
+    stores = {}
+    vector_hits = []
+    rankings = []
+    for namespace in namespaces:
+        for doc_id, doc, distance in namespace.store.query(embedding, candidates, where):
+            if distance > MAX_VECTOR_DISTANCE:
                 continue
+            documents[doc_id] = doc
+            vector_hits.append((distance, doc_id))
+        keyword_hits = namespace.keyword_index.search(query, candidates, source_filter)
+        rankings.append([doc_id for doc_id, _ in keyword_hits])
+        stores.update((doc_id, namespace.store) for doc_id, _ in keyword_hits)
 
-            with open(json_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+    rankings.append([doc_id for _, doc_id in sorted(vector_hits)[:candidates]])
+    fused = reciprocal_rank_fusion(rankings)
+    top_ids = [doc_id for doc_id, _ in fused[:n_results]]
 
-            content_chunks = []
+    for doc_id in top_ids:
+        if doc_id not in documents:
+            fetched = stores[doc_id].get(ids=[doc_id])
+            documents.update(zip(fetched["ids"], fetched["documents"]))
 
-            if isinstance(data, dict):
-                for k, v in data.items():
-                    content_chunks.append(f"{k}: {v}")
+    return [documents[doc_id] for doc_id in top_ids if documents.get(doc_id)]
 
-            elif isinstance(data, list):
-                for idx, item in enumerate(data):
-                    if isinstance(item, dict):
-                        row_items = [f"{k}: {v}" for k, v in item.items()]
-                        content_chunks.append(f"Entry {idx+1} - " + ", ".join(row_items))
-                    else:
-                        content_chunks.append(f"Entry {idx+1}: {item}")
 
-            else:
-                content_chunks.append(str(data))
+def _search_namespaces(namespace=None) -> list[str]:
+    names = [SHARED_NAMESPACE]
+    if namespace is not None and str(namespace) != SHARED_NAMESPACE:
+        names.append(str(namespace))
+    return names
 
-            grouped_chunks = [
-                "\n".join(content_chunks[i:i+8])
-                for i in range(0, len(content_chunks), 8)
-            ]
 
-            relative_path = json_file.relative_to(notes_folder)
-            for i, chunk in enumerate(grouped_chunks):
-                doc_id = f"{relative_path.stem}_json_{i}"
-                collection.upsert(
-                    documents=[chunk],
-                    ids=[doc_id],
-                    metadatas=[{
-                        "source": str(relative_path),
-                        "chunk": i,
-                        "file_hash": fhash,
-                        "type": "json",
-                    }],
-                )
-
-            logger.info(f"Loaded JSON {relative_path} ({len(content_chunks)} entries → {len(grouped_chunks)} chunks)")
-        except Exception as e:
-            logger.exception(f"Error loading JSON {json_file}: {e}")
+def retrieve_personal_notes(
+    query, n_results=3, namespace=None, source=None, note_type=None
+) -> list[str]:
+    """Return the full text of the best matching note chunks, best first."""
+    names = _search_namespaces(namespace)
+    namespaces = [_namespaces[name] for name in names if name in _namespaces]
+    return _hybrid_search(query, n_results, namespaces, source, note_type)
 
 
-def search_personal_notes(query, n_results=3):
-    """Search personal notes for relevant information"""
-    try:
-        results = collection.query(query_texts=[query], n_results=n_results)
-
-        if results["documents"] and results["documents"][0]:
-            relevant_info = []
-            for doc, _ in zip(results["documents"][0], results["metadatas"][0]):
-                preview = doc[:400] + "..." if len(doc) > 400 else doc
-                relevant_info.append(preview)
-            return "\n\n".join(relevant_info)
+def search_personal_notes(query, n_results=3, namespace=None, source=None, note_type=None):
+    """Search personal notes for relevant information.
+
+    Searches the shared notes plus the given namespace (a guild ID), optionally
+    restricted to one source file or note type ("txt", "csv" or "json").
+    """
+    if not query or not query.strip():
         return None
-    except:
+
+    if not notes_ready():
+        logger.info("Notes are still loading, skipping notes search")
         return None
+
+    cache_key = (
+        _normalize_query(query),
+        n_results,
+        tuple(_search_namespaces(namespace)),
+        source,
+        note_type,
+        get_index_generation(),
+    )
+    cached = _search_results.get(cache_key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
+    try:
+        docs = retrieve_personal_notes(query, n_results, namespace, source, note_type)
+    except Exception as e:
+        logger.exception(f"Error searching notes: {e}")
+        return None
+
+    relevant = None
+    if docs:
+        relevant_info = []
+        for doc in docs:
+            preview = doc[:400] + "..." if len(doc) > 400 else doc
+            relevant_info.append(preview)
+        relevant = "\n\n".join(relevant_info)
+
+    _search_results.put(cache_key, relevant)
+    return relevant
+
+
+async def search_personal_notes_async(
+    query, n_results=3, namespace=None, source=None, note_type=None
+):
+    """Search personal notes on the vector search executor."""
+    return await run_in_executor(
+        "vector_search",
+        search_personal_notes,
+        query,
+        n_results,
+        namespace=namespace,
+        source=source,
+        note_type=note_type,
+    )
@@ -0,0 +1,125 @@
+import asyncio
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "unix:./notes_service.sock"
+STREAM_LIMIT = 1 << 20
+
+
+class NotesServiceError(Exception):
+    """The notes service answered with an error."""
+
+
+def parse_address(address: str) -> tuple[str, str | tuple[str, int]]:
+    """Parse "unix:/path/to.sock" or "host:port" into (kind, target)."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:") :]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+async def open_connection(address: str):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(target, limit=STREAM_LIMIT)
+    host, port = target
+    return await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+
+
+class NotesServiceClient:
+    """Async client for notes_service.py with a small connection pool.
+
+    Each pooled connection carries one newline-delimited JSON request at a
+    time; up to pool_size requests run concurrently.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, pool_size: int = 4, timeout: float = 10):
+        self.address = address
+        self.timeout = timeout
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+        self._ids = itertools.count(1)
+
+    async def _acquire(self):
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                reader, writer = self._idle.pop()
+                if not writer.is_closing():
+                    return reader, writer
+            return await open_connection(self.address)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, connection, reusable: bool):
+        reader, writer = connection
+        if reusable and not writer.is_closing():
+            self._idle.append(connection)
+        else:
+            writer.close()
+        self._slots.release()
+
+    async def _call(self, op: str, **args):
+        for attempt in range(2):
+            connection = await self._acquire()
+            reader, writer = connection
+            request_id = next(self._ids)
+            try:
+                payload = {"id": request_id, "op": op, "args": args}
+                writer.write(json.dumps(payload).encode() + b"\n")
+                await writer.drain()
+                line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not line:
+                    raise ConnectionResetError("Notes service closed the connection")
+            except asyncio.TimeoutError:
+                # A slow service, not a stale connection: retrying would only
+                # double the wait. The late response would desync this
+                # connection, so it is dropped. Caught before OSError, which
+                # TimeoutError subclasses on Python 3.11+.
+                self._release(connection, reusable=False)
+                raise
+            except (OSError, asyncio.IncompleteReadError) as e:
+                # A pooled connection may have gone stale; retry once on a fresh one.
+                self._release(connection, reusable=False)
+                if attempt:
+                    raise
+                logger.info(f"Notes service connection dropped ({e}), reconnecting")
+                continue
+            except BaseException:
+                self._release(connection, reusable=False)
+                raise
+
+            self._release(connection, reusable=True)
+            response = json.loads(line)
+            if not response.get("ok"):
+                raise NotesServiceError(response.get("error", "unknown error"))
+            return response.get("result")
+
+    async def search(self, query, n_results=3, namespace=None, source=None, note_type=None):
+        return await self._call(
+            "search",
+            query=query,
+            n_results=n_results,
+            namespace=None if namespace is None else str(namespace),
+            source=source,
+            note_type=note_type,
+        )
+
+    async def status(self) -> dict:
+        return await self._call("status")
+
+    async def reindex(self, paths) -> int:
+        return await self._call("reindex", paths=[str(path) for path in paths])
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, asyncio.IncompleteReadError):
+                pass
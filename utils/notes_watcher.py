@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from utils.executors import run_in_executor
+from utils.notes import NOTE_SUFFIXES, NOTES_FOLDER, reindex_note_files
+
+try:
+    from watchfiles import awatch
+except ImportError:
+    awatch = None
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = 2.0
+POLL_INTERVAL = 5.0
+
+
+def _snapshot(folder: Path) -> dict[str, tuple[int, int]]:
+    """Map notes-relative path -> (mtime_ns, size) for every notes file."""
+    snapshot = {}
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif entry.name.endswith(NOTE_SUFFIXES):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                relative = Path(entry.path).relative_to(folder).as_posix()
+                snapshot[relative] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def _diff_snapshots(old: dict, new: dict) -> set[str]:
+    changed = {path for path, sig in new.items() if old.get(path) != sig}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+
+class NotesWatcher:
+    """Watch the notes folder and incrementally reindex files that change.
+
+    Uses inotify (via watchfiles) when available, otherwise polls file stats.
+    Bursts of changes are debounced and reindexed together off the event loop.
+    """
+
+    def __init__(
+        self,
+        folder: Path = NOTES_FOLDER,
+        debounce: float = DEBOUNCE_SECONDS,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        self.folder = folder
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        if not self.folder.exists():
+            logger.info("Notes folder doesn't exist, watcher not started")
+            return
+        try:
+            if awatch is not None:
+                await self._watch_inotify()
+            else:
+                await self._watch_polling()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Notes watcher stopped: {e}")
+
+    async def _watch_inotify(self):
+        logger.info(f"Watching {self.folder} for note changes (inotify)")
+        root = self.folder.resolve()
+        debounce_ms = int(self.debounce * 1000)
+        async for changes in awatch(root, debounce=debounce_ms):
+            paths = set()
+            for _, changed_path in changes:
+                changed_path = Path(changed_path)
+                if changed_path.suffix in NOTE_SUFFIXES:
+                    paths.add(changed_path.relative_to(root).as_posix())
+            if paths:
+                await self._reindex(paths)
+
+    async def _watch_polling(self):
+        logger.info(f"Watching {self.folder} for note changes (polling)")
+        loop = asyncio.get_running_loop()
+        previous = await run_in_executor("ingestion", _snapshot, self.folder)
+        pending: set[str] = set()
+        last_change = 0.0
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = await run_in_executor("ingestion", _snapshot, self.folder)
+            changed = _diff_snapshots(previous, current)
+            previous = current
+
+            if changed:
+                pending |= changed
+                last_change = loop.time()
+                continue
+
+            if pending and loop.time() - last_change >= self.debounce:
+                paths, pending = pending, set()
+                await self._reindex(paths)
+
+    async def _reindex(self, paths: set[str]):
+        logger.info(f"Notes changed, reindexing {len(paths)} file(s)")
+        await run_in_executor(
+            "ingestion", reindex_note_files, [Path(p) for p in paths]
+        )
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone, tzinfo
+
+MIN_INTERVAL = timedelta(minutes=1)
+# How far ahead a cron rule is searched before it is declared impossible
+# (e.g. "0 0 31 2 *").
+CRON_SEARCH_DAYS = 5 * 366
+
+_MONTH_NAMES = {
+    name: i
+    for i, name in enumerate(
+        ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"),
+        start=1,
+    )
+}
+_DOW_NAMES = {
+    name: i for i, name in enumerate(("SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"))
+}
+
+
+class IntervalRule:
+    """Fire every fixed interval, anchored on the previous fire time."""
+
+    def __init__(self, interval: timedelta):
+        if interval < MIN_INTERVAL:
+            raise ValueError("Recurring reminders must be at least a minute apart")
+        self.interval = interval
+
+    def next_after(self, previous: datetime, now: datetime) -> datetime:
+        """First fire time after now, skipping any occurrences that were missed."""
+        if previous > now:
+            return previous
+        missed = (now - previous) // self.interval + 1
+        return previous + missed * self.interval
+
+
+def _parse_field(field: str, low: int, high: int, names=None) -> frozenset[int]:
+    values = set()
+    for part in field.upper().split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step in cron field {field!r}")
+
+        if part == "*":
+            start, end = low, high
+        else:
+            bounds = [names.get(b, b) if names else b for b in part.split("-", 1)]
+            start = int(bounds[0])
+            end = int(bounds[1]) if len(bounds) == 2 else (high if step > 1 else start)
+
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field {field!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronRule:
+    """Standard 5-field cron expression (minute hour day month weekday) in a timezone.
+
+    Day of month and day of week follow cron's rule: if both are restricted,
+    a day matching either one fires.
+    """
+
+    def __init__(self, expression: str, zone: tzinfo):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("Cron expressions need 5 fields: minute hour day month weekday")
+        minute, hour, day, month, weekday = fields
+        self.expression = " ".join(fields)
+        self.zone = zone
+        self.minutes = sorted(_parse_field(minute, 0, 59))
+        self.hours = sorted(_parse_field(hour, 0, 23))
+        self.days = _parse_field(day, 1, 31)
+        self.months = _parse_field(month, 1, 12, _MONTH_NAMES)
+        # Cron allows 7 for Sunday as well as 0
+        self.weekdays = frozenset(
+            d % 7 for d in _parse_field(weekday, 0, 7, _DOW_NAMES)
+        )
+        self._any_day = day == "*"
+        self._any_weekday = weekday == "*"
+
+    def _day_matches(self, date) -> bool:
+        if date.month not in self.months:
+            return False
+        day_ok = date.day in self.days
+        # Python: Monday=0; cron: Sunday=0
+        weekday_ok = (date.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, previous: datetime, now: datetime) -> datetime:
+        """First matching time strictly after both previous and now.
+
+        Candidates are compared in UTC: aware datetimes sharing a tzinfo
+        compare by wall clock, which is wrong around DST changes. A time in
+        the repeated hour when clocks go back fires once, at its first
+        occurrence; a time skipped when clocks go forward fires an hour late.
+        """
+        after = max(previous, now).astimezone(timezone.utc)
+        date = after.astimezone(self.zone).date()
+        for _ in range(CRON_SEARCH_DAYS):
+            if self._day_matches(date):
+                # Local order can differ from UTC order across a DST change,
+                # so take the earliest of the day's matches rather than the first
+                best = None
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        fire_at = datetime(
+                            date.year, date.month, date.day, hour, minute, tzinfo=self.zone
+                        ).astimezone(timezone.utc)
+                        if fire_at > after and (best is None or fire_at < best):
+                            best = fire_at
+                if best is not None:
+                    return best
+            date += timedelta(days=1)
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+
+import discord
+
+from utils.links import collect_images_from_message, extract_youtube_urls
+
+logger = logging.getLogger(__name__)
+
+REPLY_CHAIN_DEPTH = int(os.getenv("REPLY_CHAIN_DEPTH", "5"))
+PROCESSED_CACHE_SIZE = 512
+# Total JPEG bytes the processed-message cache may hold across all entries
+PROCESSED_CACHE_IMAGE_BYTES = int(
+    os.getenv("REPLY_CACHE_IMAGE_BYTES", str(64 * 1024 * 1024))
+)
+HISTORY_PAGE_SIZE = 50
+
+
+class ResolvedMessage:
+    """A message in a reply chain with its media already downloaded."""
+
+    __slots__ = ("id", "author", "content", "images", "videos", "parent_id")
+
+    def __init__(self, id, author, content, images, videos, parent_id):
+        self.id = id
+        self.author = author
+        self.content = content
+        self.images = images
+        self.videos = videos
+        self.parent_id = parent_id
+
+    @property
+    def image_bytes(self):
+        return sum(len(image.data) for image in self.images)
+
+
+# Message id -> ResolvedMessage, most recently used last. Bounded both by
+# entry count and by the image bytes the entries hold.
+_processed: OrderedDict[int, ResolvedMessage] = OrderedDict()
+_processed_image_bytes = 0
+
+
+def _cache_get(message_id):
+    record = _processed.get(message_id)
+    if record is not None:
+        _processed.move_to_end(message_id)
+    return record
+
+
+def _cache_put(record: ResolvedMessage):
+    global _processed_image_bytes
+    previous = _processed.pop(record.id, None)
+    if previous is not None:
+        _processed_image_bytes -= previous.image_bytes
+    _processed[record.id] = record
+    _processed_image_bytes += record.image_bytes
+    while _processed and (
+        len(_processed) > PROCESSED_CACHE_SIZE
+        or _processed_image_bytes > PROCESSED_CACHE_IMAGE_BYTES
+    ):
+        _, evicted = _processed.popitem(last=False)
+        _processed_image_bytes -= evicted.image_bytes
+
+
+def _parent_id(message, channel_id):
+    reference = message.reference
+    if reference is None or reference.message_id is None:
+        return None
+    if reference.channel_id not in (None, channel_id):
+        return None
+    return reference.message_id
+
+
+async def _process(message, channel_id) -> ResolvedMessage:
+    urls, stripped_text = extract_youtube_urls(message.content)
+    images = await collect_images_from_message(stripped_text, message.attachments)
+    record = ResolvedMessage(
+        message.id,
+        message.author.display_name,
+        message.content,
+        images,
+        urls,
+        _parent_id(message, channel_id),
+    )
+    _cache_put(record)
+    return record
+
+
+async def _fetch_page(channel, message_id, fetched, remaining):
+    """Fetch the message and the page of history before it in one request.
+
+    Ancestors in a reply thread are usually close together, so this one
+    round trip typically covers the next few levels as well. When only this
+    one message is still needed, it is fetched on its own.
+    """
+    if remaining <= 1:
+        fetched[message_id] = await channel.fetch_message(message_id)
+        return
+    async for message in channel.history(
+        limit=HISTORY_PAGE_SIZE, before=discord.Object(id=message_id + 1)
+    ):
+        fetched.setdefault(message.id, message)
+    if message_id not in fetched:
+        fetched[message_id] = await channel.fetch_message(message_id)
+
+
+async def resolve_reply_chain(message, depth: int = REPLY_CHAIN_DEPTH):
+    """Return up to depth ancestors of message, nearest first.
+
+    Already-processed messages come from an LRU cache with their media,
+    bounded by entry count and total image bytes. Missing ones are fetched
+    a history page at a time, and the media of every newly seen ancestor is
+    downloaded concurrently.
+    """
+    channel = message.channel
+    fetched = {}
+    resolved = message.reference.resolved if message.reference else None
+    if isinstance(resolved, discord.Message):
+        fetched[resolved.id] = resolved
+
+    chain = []
+    parent_id = _parent_id(message, channel.id)
+    while parent_id is not None and len(chain) < depth:
+        record = _cache_get(parent_id)
+        if record is not None:
+            chain.append(record)
+            parent_id = record.parent_id
+            continue
+
+        if parent_id not in fetched:
+            try:
+                await _fetch_page(channel, parent_id, fetched, depth - len(chain))
+            except discord.NotFound:
+                logger.warning(f"Replied message {parent_id} not found")
+                break
+            except discord.HTTPException as e:
+                logger.warning(f"Could not fetch replied message {parent_id}: {e}")
+                break
+
+        ancestor = fetched[parent_id]
+        chain.append(ancestor)
+        parent_id = _parent_id(ancestor, channel.id)
+
+    pending = [
+        (i, entry) for i, entry in enumerate(chain) if isinstance(entry, discord.Message)
+    ]
+    if pending:
+        records = await asyncio.gather(
+            *(_process(entry, channel.id) for _, entry in pending)
+        )
+        for (i, _), record in zip(pending, records):
+            chain[i] = record
+
+    return chain
@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on a single sleep, so wall-clock jumps (NTP, suspend) are
+# noticed within a minute.
+MAX_SLEEP_SECONDS = 60.0
+
+
+class Reminder:
+    __slots__ = (
+        "id", "user_id", "channel_id", "message", "remind_at", "recurrence", "recurrence_tz"
+    )
+
+    def __init__(
+        self,
+        id,
+        user_id,
+        channel_id,
+        message,
+        remind_at: datetime,
+        recurrence=None,
+        recurrence_tz=None,
+    ):
+        if remind_at.tzinfo is None:
+            remind_at = remind_at.replace(tzinfo=timezone.utc)
+        self.id = id
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.message = message
+        self.remind_at = remind_at.astimezone(timezone.utc)
+        self.recurrence = recurrence
+        self.recurrence_tz = recurrence_tz
+
+    @classmethod
+    def from_row(cls, row):
+        # A row's next delivery is next_fire_at; remind_at there is only the
+        # first occurrence of a recurring reminder.
+        return cls(
+            row["id"],
+            row["user_id"],
+            row["channel_id"],
+            row["message"],
+            row["next_fire_at"],
+            row["recurrence"],
+            row["recurrence_tz"],
+        )
+
+    def __repr__(self):
+        return f"Reminder({self.id}, at={self.remind_at.isoformat()})"
+
+
+class ReminderScheduler:
+    """Fire reminders from one coroutine driven by a min-heap of due times.
+
+    schedule() and cancel() are O(log n) and O(1); cancelled or rescheduled
+    entries are left in the heap and skipped when they surface. The runner
+    sleeps until the earliest due time and is woken early when an earlier
+    reminder is scheduled. on_due is awaited in its own task per due batch,
+    so a slow delivery never delays the next timer.
+    """
+
+    def __init__(self, on_due):
+        self._on_due = on_due
+        self._heap: list[tuple[float, int, int]] = []
+        self._reminders: dict[int, Reminder] = {}
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._deliveries: set[asyncio.Task] = set()
+
+    def __len__(self):
+        return len(self._reminders)
+
+    def __contains__(self, reminder_id):
+        return reminder_id in self._reminders
+
+    def next_due(self) -> datetime | None:
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return datetime.fromtimestamp(self._heap[0][0], timezone.utc)
+
+    def schedule(self, reminder: Reminder):
+        """Add or reschedule a reminder."""
+        due = reminder.remind_at.timestamp()
+        self._reminders[reminder.id] = reminder
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, reminder.id))
+        if self._heap[0][2] == reminder.id:
+            self._wakeup.set()
+        self._maybe_compact()
+
+    def cancel(self, reminder_id) -> bool:
+        return self._reminders.pop(reminder_id, None) is not None
+
+    def _is_stale(self, entry) -> bool:
+        due, _, reminder_id = entry
+        reminder = self._reminders.get(reminder_id)
+        return reminder is None or reminder.remind_at.timestamp() != due
+
+    def _drop_stale(self):
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _maybe_compact(self):
+        # Rebuild once stale entries outnumber live ones, keeping memory O(n)
+        if len(self._heap) > 2 * len(self._reminders) + 64:
+            self._heap = [entry for entry in self._heap if not self._is_stale(entry)]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> list[Reminder]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_stale(entry):
+                continue
+            due.append(self._reminders.pop(entry[2]))
+        return due
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            self._drop_stale()
+            if self._heap:
+                delay = min(self._heap[0][0] - time.time(), MAX_SLEEP_SECONDS)
+            else:
+                delay = None
+
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self._pop_due(time.time())
+            if due:
+                task = asyncio.create_task(self._deliver(due))
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, reminders: list[Reminder]):
+        try:
+            await self._on_due(reminders)
+        except Exception:
+            logger.exception(f"Failed to deliver {len(reminders)} reminder(s)")
+
+
+class ChannelDeliveryQueue:
+    """Coalesce reminders per channel and pace sends to each channel.
+
+    The first reminder for an idle channel starts a short collection window;
+    everything queued for that channel meanwhile is handed to send() as one
+    batch. Further batches for the same channel are at least
+    min_interval seconds apart.
+    """
+
+    def __init__(self, send, coalesce_seconds: float = 1.0, min_interval: float = 1.0):
+        self._send = send
+        self.coalesce_seconds = coalesce_seconds
+        self.min_interval = min_interval
+        self._pending: dict[int, list[Reminder]] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+
+    def put(self, reminder: Reminder):
+        self._pending.setdefault(reminder.channel_id, []).append(reminder)
+        if reminder.channel_id not in self._workers:
+            self._workers[reminder.channel_id] = asyncio.create_task(
+                self._drain(reminder.channel_id)
+            )
+
+    async def _drain(self, channel_id):
+        try:
+            await asyncio.sleep(self.coalesce_seconds)
+            while True:
+                batch = self._pending.pop(channel_id, None)
+                if not batch:
+                    return
+                try:
+                    await self._send(channel_id, batch)
+                except Exception:
+                    logger.exception(
+                        f"Failed to deliver {len(batch)} reminder(s) "
+                        f"to channel {channel_id}"
+                    )
+                await asyncio.sleep(self.min_interval)
+        finally:
+            self._workers.pop(channel_id, None)
+
+    async def close(self):
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,416 @@
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKEND = os.getenv("NOTES_VECTOR_BACKEND", "chroma")
+NUMPY_STORE_PATH = Path("./vector_store")
+QUERY_BLOCK_ROWS = 8192
+
+
+def _matches(metadata: dict, where: dict | None) -> bool:
+    """Evaluate the subset of Chroma's where syntax the notes code uses."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, expected in condition.items():
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+                if op == "$in" and value not in expected:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class VectorStore(ABC):
+    """Minimal interface the notes index needs from a vector backend.
+
+    get() returns {"ids": [...], "documents": [...], "metadatas": [...]};
+    query() returns (id, document, distance) tuples, nearest first, where
+    distance is squared L2 between normalized embeddings.
+    """
+
+    @abstractmethod
+    def upsert(self, ids, documents, metadatas, embeddings):
+        ...
+
+    @abstractmethod
+    def delete(self, ids):
+        ...
+
+    @abstractmethod
+    def get(self, ids=None, where=None, limit=None, offset=None):
+        ...
+
+    @abstractmethod
+    def query(self, embedding, n_results, where=None):
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    def persist(self):
+        """Flush pending changes to disk (no-op for backends that autosave)."""
+
+
+class ChromaVectorStore(VectorStore):
+    def __init__(self, name="personal_notes"):
+        from utils.chroma_client import get_collection
+
+        self.collection = get_collection(name)
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.collection.upsert(
+            ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings
+        )
+
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def get(self, ids=None, where=None, limit=None, offset=None):
+        results = self.collection.get(
+            ids=ids,
+            where=where,
+            limit=limit,
+            offset=offset,
+            include=["documents", "metadatas"],
+        )
+        return {
+            "ids": results["ids"],
+            "documents": results["documents"],
+            "metadatas": results["metadatas"],
+        }
+
+    def query(self, embedding, n_results, where=None):
+        count = self.collection.count()
+        if not count:
+            return []
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=min(n_results, count),
+            where=where,
+            include=["documents", "distances"],
+        )
+        return list(
+            zip(results["ids"][0], results["documents"][0], results["distances"][0])
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force store over a memory-mapped float32 embedding matrix.
+
+    Rows are only appended or tombstoned between persist() calls, and
+    compaction writes a new matrix file, so the records on disk always
+    describe a matrix whose referenced rows were never overwritten.
+
+    records.jsonl is an append-only log: a header line, then one line per
+    row in matrix order (null for a row deleted before it was persisted)
+    and {"deleted": [...]} lines for tombstones. persist() only appends what
+    changed since the last call; compaction rewrites the log from scratch.
+    """
+
+    def __init__(self, name="personal_notes", root: Path | None = None):
+        self.path = Path(root or NUMPY_STORE_PATH) / name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._dim = None
+        self._file = None
+        self._matrix = None
+        self._capacity = 0
+        self._ids: list[str | None] = []
+        self._documents: list[str | None] = []
+        self._metadatas: list[dict | None] = []
+        self._row_of: dict[str, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._persisted_rows = 0
+        self._deleted_rows: list[int] = []
+        self._rewrite = True
+        self._load()
+
+    @property
+    def _records_path(self) -> Path:
+        return self.path / "records.jsonl"
+
+    def _load(self):
+        if not self._records_path.exists():
+            return
+        with open(self._records_path, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            logger.warning(f"Ignoring unreadable vector store {self.path}")
+            return
+        self._dim = header["dim"]
+        self._file = header["file"]
+
+        deleted = []
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn final append; the next persist rewrites the log
+                break
+            if isinstance(entry, dict):
+                deleted.extend(entry["deleted"])
+            elif entry is None:
+                self._ids.append(None)
+                self._documents.append(None)
+                self._metadatas.append(None)
+            else:
+                self._row_of[entry[0]] = len(self._ids)
+                self._ids.append(entry[0])
+                self._documents.append(entry[1])
+                self._metadatas.append(entry[2])
+        else:
+            self._rewrite = False
+
+        self._open_matrix(max(len(self._ids), 1))
+        self._live = np.zeros(self._capacity, dtype=bool)
+        self._live[: len(self._ids)] = [doc_id is not None for doc_id in self._ids]
+        for row in deleted:
+            if self._ids[row] is not None:
+                self._tombstone(row)
+        self._persisted_rows = len(self._ids)
+
+    def _open_matrix(self, capacity: int):
+        matrix_path = self.path / self._file
+        needed = capacity * self._dim * 4
+        if not matrix_path.exists() or matrix_path.stat().st_size < needed:
+            with open(matrix_path, "ab") as f:
+                f.truncate(needed)
+        self._matrix = np.memmap(
+            matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim)
+        )
+        self._capacity = capacity
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, 1024)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = None
+        self._open_matrix(capacity)
+        if self._live.size < capacity:
+            self._live = np.concatenate(
+                [self._live, np.zeros(capacity - self._live.size, dtype=bool)]
+            )
+
+    def _tombstone(self, row: int):
+        # On load an id's replacement row can precede the old row's tombstone
+        if self._row_of.get(self._ids[row]) == row:
+            del self._row_of[self._ids[row]]
+        self._ids[row] = None
+        self._documents[row] = None
+        self._metadatas[row] = None
+        self._live[row] = False
+        if row < self._persisted_rows:
+            self._deleted_rows.append(row)
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        vectors = np.array(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._file = "embeddings-0.f32"
+            start = len(self._ids)
+            self._ensure_capacity(start + len(ids))
+            for offset, (doc_id, document, metadata) in enumerate(
+                zip(ids, documents, metadatas)
+            ):
+                old_row = self._row_of.get(doc_id)
+                if old_row is not None:
+                    self._tombstone(old_row)
+                row = start + offset
+                self._row_of[doc_id] = row
+                self._ids.append(doc_id)
+                self._documents.append(document)
+                self._metadatas.append(metadata)
+                self._live[row] = True
+            self._matrix[start : start + len(ids)] = vectors
+
+    def delete(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                row = self._row_of.get(doc_id)
+                if row is not None:
+                    self._tombstone(row)
+
+    def get(self, ids=None, where=None, limit=None, offset=None):
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]
+            else:
+                rows = [row for row, doc_id in enumerate(self._ids) if doc_id is not None]
+            if where:
+                rows = [row for row in rows if _matches(self._metadatas[row], where)]
+            start = offset or 0
+            rows = rows[start : start + limit if limit is not None else None]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows],
+                "metadatas": [self._metadatas[row] for row in rows],
+            }
+
+    def query(self, embedding, n_results, where=None):
+        query = np.array(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+
+        with self._lock:
+            rows = len(self._ids)
+            if not rows or not len(self._row_of):
+                return []
+            scores = np.empty(rows, dtype=np.float32)
+            for start in range(0, rows, QUERY_BLOCK_ROWS):
+                block = self._matrix[start : min(start + QUERY_BLOCK_ROWS, rows)]
+                scores[start : start + len(block)] = block @ query
+            live = self._live[:rows].copy()
+            if where:
+                live &= np.fromiter(
+                    (
+                        metadata is not None and _matches(metadata, where)
+                        for metadata in self._metadatas
+                    ),
+                    dtype=bool,
+                    count=rows,
+                )
+            scores[~live] = -np.inf
+
+            k = min(n_results, int(live.sum()))
+            if not k:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (self._ids[row], self._documents[row], float(2 - 2 * scores[row]))
+                for row in top
+            ]
+
+    def count(self) -> int:
+        return len(self._row_of)
+
+    @staticmethod
+    def _row_line(doc_id, document, metadata) -> str:
+        row = None if doc_id is None else [doc_id, document, metadata]
+        return json.dumps(row) + "\n"
+
+    def persist(self):
+        with self._lock:
+            if self._dim is None:
+                return
+            dead = len(self._ids) - len(self._row_of)
+            if dead and dead * 4 >= len(self._ids):
+                self._compact()
+            self._matrix.flush()
+            if self._rewrite:
+                self._write_records()
+            else:
+                self._append_records()
+            self._persisted_rows = len(self._ids)
+            self._deleted_rows.clear()
+
+    def _append_records(self):
+        new_rows = range(self._persisted_rows, len(self._ids))
+        if not new_rows and not self._deleted_rows:
+            return
+        with open(self._records_path, "a", encoding="utf-8") as f:
+            for row in new_rows:
+                f.write(self._row_line(self._ids[row], self._documents[row], self._metadatas[row]))
+            if self._deleted_rows:
+                f.write(json.dumps({"deleted": self._deleted_rows}) + "\n")
+
+    def _write_records(self):
+        tmp_path = self._records_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"dim": self._dim, "file": self._file}) + "\n")
+            for row in zip(self._ids, self._documents, self._metadatas):
+                f.write(self._row_line(*row))
+        os.replace(tmp_path, self._records_path)
+        self._rewrite = False
+        # Matrices from earlier compactions, and the float16 files and
+        # records.json of older versions (rebuilt from the notes folder)
+        for stale in self.path.glob("embeddings-*"):
+            if stale.name != self._file:
+                stale.unlink(missing_ok=True)
+        (self.path / "records.json").unlink(missing_ok=True)
+
+    def _compact(self):
+        live_rows = np.flatnonzero(self._live[: len(self._ids)])
+        generation = int(self._file.split("-")[1].split(".")[0]) + 1
+        old_matrix = self._matrix
+        self._file = f"embeddings-{generation}.f32"
+        self._open_matrix(max(len(live_rows), 1))
+        for start in range(0, len(live_rows), QUERY_BLOCK_ROWS):
+            chunk = live_rows[start : start + QUERY_BLOCK_ROWS]
+            self._matrix[start : start + len(chunk)] = old_matrix[chunk]
+        del old_matrix
+
+        self._ids = [self._ids[row] for row in live_rows]
+        self._documents = [self._documents[row] for row in live_rows]
+        self._metadatas = [self._metadatas[row] for row in live_rows]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._live = np.ones(self._capacity, dtype=bool)
+        self._live[len(self._ids) :] = False
+        self._rewrite = True
+        logger.info(f"Compacted vector store {self.path} to {len(self._ids)} rows")
+
+
+_BACKENDS = {
+    "chroma": ChromaVectorStore,
+    "numpy": NumpyVectorStore,
+}
+
+
+def list_vector_stores(backend=None) -> list[str]:
+    """Names of the stores that already exist for the configured backend."""
+    backend = backend or VECTOR_BACKEND
+    if backend == "chroma":
+        from utils.chroma_client import get_chroma_client
+
+        return [
+            getattr(collection, "name", collection)
+            for collection in get_chroma_client().list_collections()
+        ]
+    if backend == "numpy":
+        if not NUMPY_STORE_PATH.exists():
+            return []
+        return [entry.name for entry in NUMPY_STORE_PATH.iterdir() if entry.is_dir()]
+    raise ValueError(f"Unknown vector backend: {backend}")
+
+
+def open_vector_store(name="personal_notes", backend=None) -> VectorStore:
+    """Open the configured vector backend (NOTES_VECTOR_BACKEND: chroma or numpy)."""
+    backend = backend or VECTOR_BACKEND
+    try:
+        store_class = _BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown vector backend: {backend}") from None
+    return store_class(name)
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from db import (
+    delete_expired_video_analyses,
+    get_video_analysis,
+    save_video_analysis,
+)
+from utils.ai import NO_RESPONSE_TEXT, analyze_video
+from utils.executors import run_in_executor
+from utils.links import youtube_video_id
+
+logger = logging.getLogger(__name__)
+
+VIDEO_ANALYSIS_TTL = timedelta(days=int(os.getenv("VIDEO_ANALYSIS_TTL_DAYS", "30")))
+
+# Analyses currently being generated in the background, so repeated
+# requests for the same video (in any channel) share one Gemini call.
+_pending: dict[str, asyncio.Task] = {}
+
+
+async def _analyze_and_cache(video_id: str, url: str):
+    logger.info(f"Analyzing video {video_id} in the background")
+    analysis = await run_in_executor("ai", analyze_video, url)
+    if not analysis or analysis == NO_RESPONSE_TEXT:
+        logger.info(f"No analysis produced for video {video_id}")
+        return
+    await save_video_analysis(video_id, analysis)
+
+
+def _analysis_done(video_id: str, task: asyncio.Task):
+    _pending.pop(video_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Video analysis failed for {video_id}: {task.exception()}")
+
+
+def _start_analysis(video_id: str, url: str):
+    if video_id in _pending:
+        return
+    task = asyncio.create_task(_analyze_and_cache(video_id, url))
+    _pending[video_id] = task
+    task.add_done_callback(lambda done: _analysis_done(video_id, done))
+
+
+async def get_video_analysis_for_url(url: str):
+    """Cached analysis text for a video, or None.
+
+    A miss never waits on Gemini: the caller sends the video itself this
+    time while the analysis is generated and cached in the background.
+    """
+    video_id = youtube_video_id(url)
+    try:
+        analysis = await get_video_analysis(video_id, VIDEO_ANALYSIS_TTL)
+    except Exception as e:
+        logger.warning(f"Could not read cached analysis for {video_id}: {e}")
+        return None
+    if analysis:
+        logger.info(f"Using cached analysis for video {video_id}")
+        return analysis
+
+    _start_analysis(video_id, url)
+    return None
+
+
+async def get_video_analyses(urls) -> dict[str, str]:
+    """Map each URL with a cached analysis to its text."""
+    analyses = await asyncio.gather(*(get_video_analysis_for_url(url) for url in urls))
+    return {url: analysis for url, analysis in zip(urls, analyses) if analysis}
+
+
+async def prune_video_analyses():
+    """Drop analyses older than the TTL."""
+    await delete_expired_video_analyses(VIDEO_ANALYSIS_TTL)